@@ -0,0 +1,288 @@
+#Name: OpenBTCAD Benchmarks
+#Description: Times OpenBTCAD functions on synthetic meshes.  Runs inside Blender or from a normal Python shell.
+#Usage: python benchmark.py [results.json] [--quick]
+#       Stage results are written to results.json when a file name is given, so runs of different versions can be compared.
+#       --quick leaves out the largest meshes.
+
+#=================================================
+#Imports
+
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+
+#Outside of Blender small stand-ins for bpy and mathutils are installed so openbtcad can be imported.
+try:
+    import bpy
+    standin = False
+except ImportError:
+    standin = True
+    bpy = types.ModuleType("bpy")
+    bpy.context = types.SimpleNamespace(window_manager=types.SimpleNamespace(
+        progress_begin=lambda low, high: None,
+        progress_update=lambda value: None,
+        progress_end=lambda: None))
+    sys.modules["bpy"] = bpy
+    sys.modules["mathutils"] = types.ModuleType("mathutils")
+
+import numpy
+import openbtcad as bt
+
+
+#=================================================
+#Reference functions.  Copies of earlier OpenBTCAD versions used to compare against.
+
+#SortLineList from OpenBTCAD V0.0.6.  Rescans the remaining line list for every line.
+def SortLineListScan(linelist):
+    finallinelist = []
+    newlineset = True
+    matchfound = True
+    while len(linelist) > 0:
+        if newlineset == True:
+            newlineset = False
+            finallinelist.append("NewLineSet")
+            finallinelist.append(linelist[0])
+            linelist.remove(linelist[0])
+
+        else:
+            matchfound = False
+            for line in linelist:
+                if bt.checkpoint(finallinelist[-1][2], finallinelist[-1][3], line[0], line[1]) == True:
+                    finallinelist.append((line[0], line[1], line[2], line[3]))
+                    linelist.remove(line)
+                    matchfound = True
+
+                elif bt.checkpoint(finallinelist[-1][2], finallinelist[-1][3], line[2], line[3]) == True:
+                    finallinelist.append((line[2], line[3], line[0], line[1]))
+                    linelist.remove(line)
+                    matchfound = True
+
+            if matchfound == False:
+                newlineset = True
+    return finallinelist
+
+
+#=================================================
+#Synthetic meshes
+
+#Returns the closed loop of lines around a circle.
+def circlelines(center=(0, 0), radius=1, vertices=32):
+    points = [(center[0] + radius * math.cos(2 * math.pi * i / vertices), center[1] + radius * math.sin(2 * math.pi * i / vertices)) for i in range(vertices)]
+    return [(points[i - 1][0], points[i - 1][1], points[i][0], points[i][1]) for i in range(vertices)]
+
+
+#Returns the cross section lines of a plate with a grid of bolt holes, shuffled like objLineList output.
+def platelines(holes=100, vertices=32, seed=1):
+    side = int(math.ceil(math.sqrt(holes)))
+    size = side * 20.0
+    linelist = [(0, 0, size, 0), (size, 0, size, size), (size, size, 0, size), (0, size, 0, 0)]
+    for i in range(holes):
+        linelist.extend(circlelines((10 + 20 * (i % side), 10 + 20 * (i // side)), 4, vertices))
+
+    rand = random.Random(seed)
+    rand.shuffle(linelist)
+    return [line if rand.random() < .5 else (line[2], line[3], line[0], line[1]) for line in linelist]
+
+
+#Returns a sphere mesh with segments around and rings from pole to pole.  noise above 0 makes a lumpy blob,
+#triangles=True splits the quads so the mesh has 2 * segments * (rings - 1) triangles.
+def spheremesh(segments=32, rings=16, radius=10.0, noise=0.0, triangles=False):
+    theta = numpy.pi * numpy.arange(1, rings) / rings
+    phi = 2 * numpy.pi * numpy.arange(segments) / segments
+    theta, phi = numpy.meshgrid(theta, phi, indexing='ij')
+    r = radius * (1 + noise * numpy.sin(5 * theta) * numpy.cos(7 * phi))
+    co = numpy.column_stack(((r * numpy.sin(theta) * numpy.cos(phi)).reshape(-1), (r * numpy.sin(theta) * numpy.sin(phi)).reshape(-1),
+                             (r * numpy.cos(theta)).reshape(-1)))
+    co = numpy.vstack(((0, 0, radius), co, (0, 0, -radius)))
+    
+    ring = numpy.arange(segments)
+    nextring = (ring + 1) % segments
+    south = len(co) - 1
+    tops = numpy.column_stack((numpy.zeros(segments, dtype=numpy.int32), 1 + nextring, 1 + ring))
+    bottoms = numpy.column_stack((numpy.full(segments, south), 1 + (rings - 2) * segments + ring, 1 + (rings - 2) * segments + nextring))
+    upper = 1 + segments * numpy.arange(rings - 2)[:, None]
+    quads = numpy.stack((upper + ring, upper + segments + ring, upper + segments + nextring, upper + nextring), axis=-1).reshape(-1, 4)
+    if triangles == True:
+        quads = numpy.vstack((quads[:, (0, 1, 2)], quads[:, (0, 2, 3)]))
+    looptotal = [3] * (2 * segments) + [quads.shape[1]] * len(quads)
+    return bt.Mesh(co, looptotal, numpy.concatenate((tops.reshape(-1), bottoms.reshape(-1), quads.reshape(-1))))
+    
+    
+#Returns the walls of a plate with a grid of bolt holes, centered on Z0.  Only the walls cross Z0, so the caps are left out.
+def platemesh(holes=100, vertices=32, thickness=5.0):
+    side = int(math.ceil(math.sqrt(holes)))
+    size = side * 20.0
+    outline = [numpy.array(((0, 0), (size, 0), (size, size), (0, size)))]
+    angles = 2 * numpy.pi * numpy.arange(vertices) / vertices
+    for i in range(holes):
+        outline.append(numpy.column_stack((10 + 20 * (i % side) + 4 * numpy.cos(-angles), 10 + 20 * (i // side) + 4 * numpy.sin(-angles))))
+        
+    colist = []
+    looplist = []
+    count = 0
+    for points in outline:
+        n = len(points)
+        colist.append(numpy.column_stack((points, numpy.full(n, -thickness / 2))))
+        colist.append(numpy.column_stack((points, numpy.full(n, thickness / 2))))
+        ring = numpy.arange(n)
+        looplist.append(count + numpy.column_stack((ring, (ring + 1) % n, n + (ring + 1) % n, n + ring)).reshape(-1))
+        count = count + 2 * n
+    return bt.Mesh(numpy.vstack(colist), [4] * (count // 2), numpy.concatenate(looplist))
+    
+    
+#Returns the synthetic meshes used by benchStages by name.  quick=True leaves out the largest meshes.
+def benchmeshes(quick=False):
+    meshes = [("plate-10-holes", platemesh(10)), ("plate-100-holes", platemesh(100)), ("plate-1000-holes", platemesh(1000)),
+              ("sphere-32x16", spheremesh(32, 16)), ("sphere-256x128", spheremesh(256, 128)), ("sphere-1024x512", spheremesh(1024, 512))]
+    if quick == True:
+        return meshes[:2] + meshes[3:5]
+    return meshes + [("blob-1m-triangles", spheremesh(1000, 501, noise=.2, triangles=True))]
+    
+    
+#=================================================
+#Benchmarks
+
+#Returns the time in seconds a function call takes.
+def timecall(funct, *args):
+    start = time.perf_counter()
+    result = funct(*args)
+    return time.perf_counter() - start, result
+
+
+#Compares SortLineList against the reference scan version.
+def benchSortLineList(holecounts=(10, 50, 200, 1000), scanlimit=20000):
+    print("SortLineList: lines, linesets, scan seconds, grid seconds")
+    for holes in holecounts:
+        linelist = platelines(holes)
+        gridtime, gridresult = timecall(bt.SortLineList, list(linelist))
+        if len(linelist) <= scanlimit:
+            scantime, scanresult = timecall(SortLineListScan, list(linelist))
+            if scanresult.count("NewLineSet") != gridresult.count("NewLineSet"):
+                print("Line set count does not match the reference for " + str(holes) + " holes")
+            scantime = "%.4f" % scantime
+        else:
+            scantime = "skipped"
+        print(str(len(linelist)) + ", " + str(gridresult.count("NewLineSet")) + ", " + scantime + ", " + "%.4f" % gridtime)
+
+
+
+#Returns the seconds and peak traced memory of a call, and its result.  The call is made twice, once for time and once under tracemalloc.
+def measurecall(funct, *args):
+    seconds, result = timecall(funct, *args)
+    tracemalloc.start()
+    funct(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, result
+    
+    
+#Times each export stage on its own for every synthetic mesh.  Returns one result per mesh and stage.
+#Throughput is polygons per second for stages that read the mesh and lines per second for stages that read the cross section.
+def benchStages(meshes, layers=10):
+    results = []
+    tempdir = tempfile.mkdtemp()
+    print("Stages: mesh, stage, items, seconds, items per second, peak MB")
+    try:
+        for meshname, mesh in meshes:
+            polygons = len(mesh.looptotal)
+            zvalues = list(numpy.linspace(mesh.co[:, 2].min(), mesh.co[:, 2].max(), layers + 2)[1:-1])
+            stages = []
+            
+            seconds, peak, linelist = measurecall(bt.meshLineList, mesh)
+            stages.append(("slice", polygons, seconds, peak, 0))
+            seconds, peak, linelists = measurecall(bt.sliceLayers, mesh, zvalues)
+            stages.append(("slicelayers", polygons * layers, seconds, peak, 0))
+            seconds, peak, sortedlist = measurecall(bt.SortLineList, linelist)
+            stages.append(("chain", len(linelist), seconds, peak, 0))
+            seconds, peak, result = measurecall(bt.meshContours, mesh)
+            stages.append(("contours", polygons, seconds, peak, 0))
+            
+            filepath = os.path.join(tempdir, meshname)
+            seconds, peak, result = measurecall(writedxf, sortedlist, filepath + ".dxf")
+            stages.append(("dxf", len(linelist), seconds, peak, os.path.getsize(filepath + ".dxf")))
+            linesets = list(bt.SegmentBuffer.fromLineList(sortedlist))
+            seconds, peak, result = measurecall(writegcode, linesets, filepath + ".gcode")
+            stages.append(("gcode", len(linelist), seconds, peak, os.path.getsize(filepath + ".gcode")))
+            seconds, peak, result = measurecall(bt.writeSTL, mesh, filepath + ".stl")
+            stages.append(("stl", polygons, seconds, peak, os.path.getsize(filepath + ".stl")))
+            
+            for stage, items, seconds, peak, outbytes in stages:
+                results.append({"mesh": meshname, "vertices": len(mesh.co), "polygons": polygons, "stage": stage, "items": items,
+                                "seconds": seconds, "throughput": items / max(seconds, 1e-9), "peakbytes": peak, "outbytes": outbytes})
+                print(meshname + ", " + stage + ", " + str(items) + ", " + "%.4f" % seconds + ", " + "%.0f" % (items / max(seconds, 1e-9)) + ", " +
+                      "%.1f" % (peak / 1e6))
+    finally:
+        shutil.rmtree(tempdir)
+    return results
+    
+    
+#Writes SortLineList output to a dxf file.
+def writedxf(sortedlist, filepath):
+    with bt.DxfWriter(filepath) as dxf:
+        dxf.addLines(sortedlist)
+        
+        
+#Writes line sets, already chained by the chain stage, as gcode.
+def writegcode(linesets, filepath):
+    with bt.GcodeWriter(filepath) as gcode:
+        gcode.addRawLines(bt.gcodeLineSetText(linesets, 5))
+        gcode.addText("toolup")
+        
+        
+#Writes stage results to a JSON file with the versions they were measured with.
+def writeresults(filepath, results):
+    f = open(filepath, 'w')
+    json.dump({"openbtcad": open(bt.openbtcadcore.__file__).readline().strip("#\n").split(": ")[-1], "python": platform.python_version(),
+               "numpy": numpy.__version__, "machine": platform.machine(), "time": time.strftime("%Y-%m-%d %H:%M:%S"), "stages": results},
+              f, indent=1)
+    f.close()
+    
+    
+#Compares one objModBool per hole against objModBoolMany on a plate.  Needs Blender.
+def benchModBoolMany(holecounts=(5, 20, 50, 100)):
+    if standin == True:
+        print("objModBoolMany: skipped, run inside Blender")
+        return
+        
+    print("objModBoolMany: holes, objModBool seconds, objModBoolMany seconds")
+    for holes in holecounts:
+        times = []
+        for many in (False, True):
+            bt.objAddCube("benchplate", (holes * 20, 20, 10))
+            names = []
+            for i in range(holes):
+                bt.objAddCylinder("benchbolt" + str(i), (8, 8, 11))
+                bt.objMove("benchbolt" + str(i), (i * 20 - holes * 10 + 10, 0, 0))
+                names.append("benchbolt" + str(i))
+            bpy.context.scene.update()
+            
+            start = time.perf_counter()
+            if many == True:
+                bt.objModBoolMany("benchplate", names, 'DIFFERENCE')
+            else:
+                for name in names:
+                    bt.objModBool("benchplate", name, 'DIFFERENCE')
+            times.append(time.perf_counter() - start)
+            
+            for name in names + ["benchplate"]:
+                bt.objDelete(name)
+        print(str(holes) + ", " + "%.4f" % times[0] + ", " + "%.4f" % times[1])
+
+
+if __name__ == "__main__":
+    quick = "--quick" in sys.argv
+    filenames = [arg for arg in sys.argv[1:] if arg.startswith("--") != True]
+    benchSortLineList((10, 50, 200) if quick else (10, 50, 200, 1000))
+    results = benchStages(benchmeshes(quick))
+    if len(filenames) > 0:
+        writeresults(filenames[0], results)
+    benchModBoolMany()
@@ -7,7 +7,8 @@ platethin = 10.5
 bolt1 = 8
 
 
-#example of a simple part
+#example of a simple part.  partCache only rebuilds it when the part or the globals it uses change.
+@bt.partCache
 def mysimplepart(objname):
     #Get object locori then delete object.
     locori = bt.getLocOri(objname)
@@ -35,8 +36,6 @@ def mysimplepart(objname):
 
 
 
-#This updates all copies of the part in blender.
-objlist = bt.objReturnNameList("mysimplepart")
-for itm in objlist:
-    mysimplepart(itm)
+#This updates all copies of the part in blender.  The part is built once and every copy shares its mesh.
+bt.objUpdateAll("mysimplepart", mysimplepart)
 
@@ -3,85 +3,96 @@
 #Date: 2016.02.03
 #Blender Version: 2.74
 #Description: OpenBTCAD is a addon module for blender that allows creation of objects using scripts.  It doesn't cover all features of blender but many of the basic functions are scripted.
+#             Geometry and file functions that do not need blender are in openbtcadcore.py, this module reads blender objects into them.
 
 #=================================================
 #Imports
 
 import bpy
+import collections
+import contextlib
+import functools
+import hashlib
+import inspect
+import json
 import math
+import mathutils
+import numpy
+import os
+import time
+
+from openbtcadcore import (DXFHEADER, DXFFOOTER, dxfLineText, dxfPolylineText, dxfLineSetText, DxfWriter, dxfOpen, dxfAddLine, dxfClose,
+                           GCODEHEADER, GCODEFOOTER, gcodePointText, gcodeLineSetText, GcodeWriter, gcodeOpen, gcodeAddPoint, gcodeAddText, gcodeClose,
+                           Transform, Mesh, mergeMeshes, loadSTL, loadOBJ,
+                           checkvalues, checkrange, checkpoint, z0xycoords, polygonEdges, slicePolygons, meshLineList, sliceLayers, pointBounds, primitiveGeometry,
+                           meshEdgeIndex, edgeIndexClear, meshContours,
+                           STLTRIANGLE, meshTriangles, writeSTL,
+                           gridcell, linegrid, gridmatch, chainLines, mergeCollinear, lineSetPolyline, chainPolylines, SEGMENTMAGIC, SegmentBuffer, SegmentWriter,
+                           lineSetClosed, lineSetReversed, travelDistance, optimizeTravel, meshLineSets, exportDXF, exportGCODE, exportSTL,
+                           sliceCachePath, sliceCacheFile, sliceCached, sliceCacheClear,
+                           loadManifest, saveManifest, exportDXFIncremental, exportGCODEIncremental, exportSTLIncremental)
+import openbtcadcore
 
 
 #=================================================
-#DXF File Functions
-
-#Open dxf file.
-def dxfOpen(filepath):
-    f = open(filepath, 'w')
-    f.write('  0\nSECTION\n  2\nBLOCKS\n  0\nENDSEC\n  0\nSECTION\n  2\nENTITIES\n')
-    f.close()
-
-
-#Write dxf line.
-def dxfAddLine(filepath, line=(0, 0, 0, 0)):
-    f = open(filepath, 'a')
-    f.write('  0\nLINE\n  8\n0\n')
-    f.write(' 10\n' + str(line[0]) + '\n')
-    f.write(' 11\n' + str(line[2]) + '\n')
-    f.write(' 20\n' + str(line[1]) + '\n')
-    f.write(' 21\n' + str(line[3]) + '\n')
-    f.close()
-
-
-#Close dxf file.
-def dxfClose(filepath):
-    f = open(filepath, 'a')
-    f.write('  0\nENDSEC\n  0\nSECTION\n  2\nOBJECTS\n  0\nDICTIONARY\n  0\nENDSEC\n  0\nEOF\n')
-    f.close()
-
-
-#=================================================
-#GCode File Functions
-
-#Open gcode file.
-def gcodeOpen(filepath):
-    f = open(filepath, 'w')
-    f.write('GCodeStart \n')
-    f.close()
-
-
-#Write gcode line.
-def gcodeAddPoint(filepath, point=(0, 0)):
-    f = open(filepath, 'a')
-    f.write('X' + str(point[0]) + ' Y' + str(point[1]) + '\n')
-    f.close()
-
-
-#Write gcode text.
-def gcodeAddText(filepath, teststring):
-    f = open(filepath, 'a')
-    f.write(str(teststring) + '\n')
-    f.close()
-    
-
-#Close gcode file.
-def gcodeClose(filepath):
-    f = open(filepath, 'a')
-    f.write('GCodeEnd \n')
-    f.close()
+#OpenBTCAD internal functions.  These functions should only be used by OpenBTCAD itself.
 
+#Objects found by objReturnByName, by name.  The cache is emptied whenever the number of objects changes.
+objcache = {}
+objcachestats = {"hits": 0, "misses": 0, "objects": 0}
 
-#=================================================
-#OpenBTCAD internal functions.  These functions should only be used by OpenBTCAD itself.
 
 #Returns a pointer to an object based on name.  Some operations need the object pointer.
+#Objects are cached by name.  A cached object is only used while it still has that name and has not been removed from blender.
 def objReturnByName(objname1):
-    r = None
-    obs = bpy.data.objects
-    for ob in obs:
-        if ob.name == objname1:
-            r = ob
+    if len(bpy.data.objects) != objcachestats["objects"]:
+        objCacheClear()
+        
+    r = objcache.get(objname1)
+    try:
+        if r != None and r.name == objname1:
+            objcachestats["hits"] = objcachestats["hits"] + 1
+            return r
+    except ReferenceError:
+        #The cached object was removed, look the name up again.
+        pass
+        
+    objcachestats["misses"] = objcachestats["misses"] + 1
+    r = bpy.data.objects.get(objname1)
+    if r != None:
+        objcache[objname1] = r
+    else:
+        objcache.pop(objname1, None)
     return r
     
+    
+#Empties the objReturnByName cache.  Removed objects are found by objReturnByName itself, this frees the objects it still holds.
+def objCacheClear():
+    objcache.clear()
+    objcachestats["objects"] = len(bpy.data.objects)
+    
+    
+#Returns objReturnByName cache hits, misses and size.
+def objCacheStats():
+    return {"hits": objcachestats["hits"], "misses": objcachestats["misses"], "size": len(objcache)}
+    
+    
+#World space bounds found by objBounds, by object name.  Each entry is (object state, bounds).
+boundscache = {}
+
+
+#Returns what objBounds checks to see if cached bounds are still good.  Changes when the object moves or gets different mesh data.
+def objBoundsState(obj):
+    return (tuple(value for row in objWorldMatrix(obj) for value in row), obj.data.as_pointer(), len(obj.data.vertices), len(obj.data.polygons))
+    
+    
+#Forgets cached bounds of an object, or of all objects if none are specified.  Used after an object's mesh is changed in place.
+def objBoundsClear(objname1=""):
+    if objname1 == "":
+        boundscache.clear()
+    else:
+        boundscache.pop(objname1, None)
+    
 
 #CoDEmanX wrote this from www.elysiun.com.  It changes the pivot point for rotation.
 def setPivotPoint(type):
@@ -115,126 +126,107 @@ def get_override(area_type, region_type):
 
 
 
-#Function that checks if a line passes Z 0.
-def checkvalues(value1=None, value2=None):
-        if value1 <= 0 <= value2 or value2 <= 0 <= value1:
-            return True
-        else:
-            return False
-            
-            
-                    
-#Function that checks if a number is in range of another number
-def checkrange(value1, value2, valrange=.0001):
-    if value1 >= value2 - valrange and value1 <= value2 + valrange:
-        return True
-    else:
-        return False
-        
-        
-        
-#returns true if point matches
-def checkpoint(xval1, yval1, xval2, yval2):
-    if checkrange(xval1, xval2) == True and checkrange(yval1, yval2) == True:
-        return True
-    else:
-        return False
+#Returns an object's world matrix made from its matrix_basis and its parents.  matrix_world is only updated by a scene update,
+#so it is out of date right after a script adds, moves, rotates or resizes an object.  Booleans set it on their objects with objSyncMatrix.
+def objWorldMatrix(obj):
+    if obj.parent != None:
+        return objWorldMatrix(obj.parent) * obj.matrix_parent_inverse * obj.matrix_basis
+    return obj.matrix_basis.copy()
+    
+    
+#Sets matrix_world of objects from objWorldMatrix, for blender code like the boolean modifier that reads matrix_world.
+def objSyncMatrix(objects):
+    for obj in objects:
+        obj.matrix_world = objWorldMatrix(obj)
         
         
+#Returns world space vertex coordinates of an object as a numpy array.  Reads the mesh in bulk with foreach_get and transforms every vertex once.
+def objWorldVertices(obj):
+    co = numpy.empty(len(obj.data.vertices) * 3, dtype=numpy.float32)
+    obj.data.vertices.foreach_get("co", co)
+    return Transform(objWorldMatrix(obj)).apply(co)
+    
+    
+#Returns an object's mesh in world space as an OpenBTCAD core Mesh.  Reads the mesh in bulk with foreach_get.
+def objMesh(obj):
+    batchFlush()
+    mesh = obj.data
+    loopstart = numpy.empty(len(mesh.polygons), dtype=numpy.int32)
+    looptotal = numpy.empty(len(mesh.polygons), dtype=numpy.int32)
+    loopverts = numpy.empty(len(mesh.loops), dtype=numpy.int32)
+    mesh.polygons.foreach_get("loop_start", loopstart)
+    mesh.polygons.foreach_get("loop_total", looptotal)
+    mesh.loops.foreach_get("vertex_index", loopverts)
+    return Mesh(objWorldVertices(obj), looptotal, loopverts, loopstart)
+    
+    
+#Returns a new blender mesh made from an OpenBTCAD core Mesh.  Edges are made from the polygons, extra loose edges can be given as vertex pairs.
+def blenderMesh(meshname, coremesh, edges=()):
+    mesh = bpy.data.meshes.new(meshname)
+    mesh.vertices.add(len(coremesh.co))
+    if len(edges) > 0:
+        mesh.edges.add(len(edges))
+        mesh.edges.foreach_set("vertices", numpy.asarray(edges, dtype=numpy.int32).reshape(-1))
+    mesh.loops.add(len(coremesh.loopverts))
+    mesh.polygons.add(len(coremesh.looptotal))
+    mesh.vertices.foreach_set("co", numpy.asarray(coremesh.co, dtype=numpy.float32).reshape(-1))
+    mesh.loops.foreach_set("vertex_index", coremesh.polygonLoops())
+    mesh.polygons.foreach_set("loop_start", numpy.asarray(numpy.cumsum(coremesh.looptotal) - coremesh.looptotal, dtype=numpy.int32))
+    mesh.polygons.foreach_set("loop_total", coremesh.looptotal)
+    mesh.update(calc_edges=True)
+    return mesh
+    
+    
+#Returns one blender mesh holding the world space geometry of every object in a list.
+def objMergedMesh(meshname, objects):
+    return blenderMesh(meshname, mergeMeshes([objMesh(obj) for obj in objects]))
+    
+    
+#Unit primitive meshes made by primitiveMesh, by (type, vertices, r1, r2).
+primitivecache = {}
 
 
-
-def z0xycoords(pointA,pointB):
-	""" Takes two three-dimensional coordinates (x,y,z) in list or tuple form.
-	Computes the x and y coordinates of the line at the z=0 plane.
-	Returns a list of length 2 with the x and y coords.
-	"""
-	if (pointA[2] == 0): #Point A is on the z=0 plane already
-		return pointA
-	elif (pointB[2] == 0 ): #Point B is on the z=0 plane already
-		return pointB
-	elif (pointA[2]*pointB[2] > 0 ): # Both points fall on the same side of the z=0 plane, so we cannot compute an answer
-		return False
-	else:
-		totaldiff = [(pointA[i]-pointB[i]) for i in range(3)] # The differences between the x,y, and z coordinates of the two points
-		xy = [ ( pointA[i] - totaldiff[i]*float(pointA[2])/totaldiff[2]) for i in range(2) ] # in each dimension, endpoint minus (difference times ratio of z)
-		return xy 
-        
+#Returns the unit primitive mesh for a key, building it the first time.  New objects get a copy of it.
+def primitiveMesh(key):
+    templatename = primitivecache.get(key)
+    if templatename != None and bpy.data.meshes.get(templatename) != None:
+        return bpy.data.meshes[templatename]
         
-        
-#Return cross section of object through Z0, return each line as tuple x0,y0,x1,y1
-def objLineList(objname):
-    
-    obj = bpy.data.objects[objname]
-    wm = bpy.data.objects[objname].matrix_world
-    
-    #print("Generate X Section of: " + objname)
-
-    #Get each polygon out of an object.
-    finallinelist = []
-    for eachpolygon in obj.data.polygons:
-        #get each vertex out of each polygon. add to eachvertexlist. vertex list is re-populated for each polygon.
-        eachvertexlist = []
-        for eachvertex in eachpolygon.vertices:
-            #print(wm * obj.data.vertices[eachvertex].co)
-            #print("Each Vertex in Each Polygon")
-            eachvertexlist.append(wm * obj.data.vertices[eachvertex].co)
-        #print("Each Vertex found and added to list")
-        
-        #create line from each polygon that crosses Z0    
-        prev_vertex = None
-        polygonline = [] 
-        for avertex in eachvertexlist:
-            if prev_vertex == None:
-                prev_vertex = avertex
-                xyvalue = z0xycoords((eachvertexlist[-1][0], eachvertexlist[-1][1], eachvertexlist[-1][2]), (avertex[0], avertex[1], avertex[2]))
-                if xyvalue != False:
-                    polygonline.append(xyvalue)
-                continue
-            else:
-                xyvalue = z0xycoords((prev_vertex[0], prev_vertex[1], prev_vertex[2]), (avertex[0], avertex[1], avertex[2]))
-                if xyvalue != False:
-                    polygonline.append(xyvalue)
-                prev_vertex = avertex
-                
-          
-        if polygonline != []:
-            finallinelist.append((polygonline[0][0], polygonline[0][1], polygonline[1][0], polygonline[1][1]))
-    #print("X Section Complete")
-    return finallinelist
+    mesh = blenderMesh("OpenBTCAD-" + "-".join(str(value) for value in key), *primitiveGeometry(key))
+    primitivecache[key] = mesh.name
+    return mesh
     
     
+#Adds a new object to the scene with a copy of a primitive mesh, scaled by resize.  The new object is selected and active like one added by an operator.
+def objAddPrimitive(objname1, key, resize=(1,1,1)):
+    mesh = primitiveMesh(key).copy()
+    mesh.name = objname1
+    object1 = bpy.data.objects.new(objname1, mesh)
+    object1.scale = (resize[0], resize[1], resize[2])
+    object1.matrix_world = objWorldMatrix(object1)
+    bpy.context.scene.objects.link(object1)
+    object1.select = True
+    bpy.context.scene.objects.active = object1
+    objBoundsClear(objname1)
+    return object1
+    
     
+#Return cross section of object through Z0, return each line as tuple x0,y0,x1,y1
+#buffer=True returns the cross section already joined into line sets as a SegmentBuffer.
+#cachedir returns the SegmentBuffer memory mapped from the slice cache in cachedir, the object is only sliced if its mesh is not there yet.
+def objLineList(objname, buffer=False, cachedir=None):
+    batchFlush()
+    if cachedir != None:
+        return sliceCached(objMesh(objReturnByName(objname)), cachedir)
+    if buffer == True:
+        return meshLineSets(objMesh(objReturnByName(objname)))
+    return meshLineList(objMesh(objReturnByName(objname)))
     
-#Sorts line list into toolpath order with section breaks
-def SortLineList(linelist):
-    finallinelist = []
-    newlineset = True
-    matchfound = True
+    
+#Sorts line list into toolpath order with section breaks, a SegmentBuffer gives a sorted SegmentBuffer
+def SortLineList(linelist, valrange=.0001):
     bpy.context.window_manager.progress_begin(0,len(linelist))
-    while len(linelist) > 0:
-        bpy.context.window_manager.progress_update(len(linelist))
-        if newlineset == True:
-            newlineset = False
-            finallinelist.append("NewLineSet")
-            finallinelist.append(linelist[0])
-            linelist.remove(linelist[0])
-            
-        else:
-            matchfound = False
-            for line in linelist:
-                if checkpoint(finallinelist[-1][2], finallinelist[-1][3], line[0], line[1]) == True:
-                    finallinelist.append((line[0], line[1], line[2], line[3]))
-                    linelist.remove(line)
-                    matchfound = True        
-                
-                elif checkpoint(finallinelist[-1][2], finallinelist[-1][3], line[2], line[3]) == True:
-                    finallinelist.append((line[2], line[3], line[0], line[1]))
-                    linelist.remove(line)
-                    matchfound = True
-            
-            if matchfound == False:
-                newlineset = True
+    finallinelist = openbtcadcore.SortLineList(linelist, valrange, bpy.context.window_manager.progress_update)
     bpy.context.window_manager.progress_end()
     return finallinelist                
             
@@ -317,18 +309,57 @@ def objUnSelect(objname1=""):
 
 #Deletes all selected objects from scene.
 def objDeleteSelected():
+    batchFlush()
     bpy.ops.object.delete()
+    objCacheClear()
+    objBoundsClear()
 
 
 #Delete object with specific name.
 def objDelete(objname1=""):
+    batchFlush()
     objUnSelect()
     objSelect(objname1=objname1)
     objDeleteSelected()
 
 
-#Update all objects with same name.
-#def objUpdateAll(objname1="", funct='')
+#Update all objects with same name.  funct builds the part for one object name, like mysimplepart in example.py.
+#With linked True the part is built once and every copy is pointed at the same mesh, keeping its own location and orientation.
+def objUpdateAll(objname1="", funct=None, linked=True):
+    batchFlush()
+    if objname1 == "":
+        print("Bad parameter in objUpdateAll:  " + str(objname1) + ", " + str(funct) + ", " + str(linked))
+        print("objname1 must be added")
+        return
+        
+    if callable(funct) != True:
+        print("Bad parameter in objUpdateAll:  " + str(objname1) + ", " + str(funct) + ", " + str(linked))
+        print("funct must be a function that takes an object name")
+        return
+        
+    objlist = objReturnNameList(objname1)
+    if linked != True:
+        for itm in objlist:
+            funct(itm)
+        return
+        
+    funct(objlist[0])
+    object1 = objReturnByName(objlist[0])
+    if object1 == None:
+        print("Bad parameter in objUpdateAll:  " + str(objname1) + ", " + str(funct) + ", " + str(linked))
+        print("funct did not make objname1")
+        return
+        
+    for itm in objlist[1:]:
+        object2 = objReturnByName(itm)
+        locori = getLocOri(itm)
+        oldmesh = object2.data
+        object2.data = object1.data
+        object2.scale = object1.scale
+        setLocOri(itm, locori)
+        objBoundsClear(itm)
+        if oldmesh.users == 0:
+            bpy.data.meshes.remove(oldmesh)
         
 
 #=================================================
@@ -352,6 +383,9 @@ def objMove(objname1, movement=(0,0,0), setlocation=True):
         print("setlocation must be True or False")
         return
         
+    if batchRecord("objMove", objname1, tuple(movement), setlocation) == True:
+        return
+        
     if setlocation == True:   
         object1.location[0] = movement[0]
         object1.location[1] = movement[1]
@@ -363,9 +397,17 @@ def objMove(objname1, movement=(0,0,0), setlocation=True):
         object1.location[2] = object1.location[2] + movement[2]
     
 
-#Rotates an object with a specific name.
+#Rotates an object with a specific name, or every object in a list of names.  Rotations are in degrees around the global X, then Y, then Z axis.
+#SELF turns each object around its own origin, CENTER around the world origin and CURSOR around the 3D cursor.
+#The rotation is applied to each object's matrix directly, so no operator, view3d area or selection is needed.
 def objRotate(objname1, rotation=(0,0,0), pivot="SELF"):
-    if objReturnByName(objname1) == None:
+    if isinstance(objname1, (list, tuple)) == True:
+        objnames = list(objname1)
+    else:
+        objnames = [objname1]
+        
+    objects = [objReturnByName(objname) for objname in objnames]
+    if len(objects) == 0 or None in objects:
         print("Bad parameter in objRotate: " + str(objname1) + ", " + str(rotation) + ", " + str(pivot))
         print("objname1 does not exist")
         return
@@ -379,32 +421,32 @@ def objRotate(objname1, rotation=(0,0,0), pivot="SELF"):
         print("Bad parameter in objRotate: " + str(objname1) + ", " + str(rotation) + ", " + str(pivot))
         print("pivot must be self, center, cursor")
         return
-    
-    objUnSelect()
-    objSelect(objname1)
-            
-    if pivot.upper() == "SELF":
-        setPivotPoint('ACTIVE_ELEMENT')
-        bpy.ops.transform.rotate(value=(rotation[0] * 0.0174532925), axis=(1,0,0))
-        bpy.ops.transform.rotate(value=(rotation[1] * 0.0174532925), axis=(0,1,0))
-        bpy.ops.transform.rotate(value=(rotation[2] * 0.0174532925), axis=(0,0,1))
-
-    elif pivot.upper() == "CENTER":
-        setPivotPoint('CURSOR')
-        setCursorLocation()
-        override = get_override('VIEW_3D', 'WINDOW')
-        bpy.ops.transform.rotate(override, value=(rotation[0] * 0.0174532925), axis=(1,0,0))
-        bpy.ops.transform.rotate(override, value=(rotation[1] * 0.0174532925), axis=(0,1,0))
-        bpy.ops.transform.rotate(override, value=(rotation[2] * 0.0174532925), axis=(0,0,1))
-        setPivotPoint('ACTIVE_ELEMENT')
-        
-    elif pivot.upper() == "CURSOR":
-        setPivotPoint('CURSOR')
-        override = get_override('VIEW_3D', 'WINDOW')
-        bpy.ops.transform.rotate(override, value=(rotation[0] * 0.0174532925), axis=(1,0,0))
-        bpy.ops.transform.rotate(override, value=(rotation[1] * 0.0174532925), axis=(0,1,0))
-        bpy.ops.transform.rotate(override, value=(rotation[2] * 0.0174532925), axis=(0,0,1))
-        setPivotPoint('ACTIVE_ELEMENT')
+        
+    if batchRecord("objRotate", objnames if isinstance(objname1, (list, tuple)) else objname1, tuple(rotation), pivot) == True:
+        return
+        
+    #Angles are negated to turn the same way as the rotate operator in Blender 2.7x, which turns positive angles clockwise looking down the axis.
+    rotmatrix = (mathutils.Matrix.Rotation(math.radians(-rotation[2]), 4, 'Z') * mathutils.Matrix.Rotation(math.radians(-rotation[1]), 4, 'Y') *
+                 mathutils.Matrix.Rotation(math.radians(-rotation[0]), 4, 'X'))
+                 
+    if pivot.upper() == "CURSOR":
+        center = mathutils.Vector(bpy.context.scene.cursor_location)
+    else:
+        center = mathutils.Vector((0, 0, 0))
+        
+    #World matrices are made from matrix_basis, matrix_world is only updated by a scene update and may be out of date after objMove.
+    #matrix_world is set too, so blender code that reads it, like the boolean modifier, sees the rotation.
+    for object1 in objects:
+        parentmatrix = mathutils.Matrix.Identity(4)
+        if object1.parent != None:
+            parentmatrix = objWorldMatrix(object1.parent) * object1.matrix_parent_inverse
+        worldmatrix = parentmatrix * object1.matrix_basis
+        if pivot.upper() == "SELF":
+            center = worldmatrix.to_translation()
+        worldmatrix = mathutils.Matrix.Translation(center) * rotmatrix * mathutils.Matrix.Translation(-center) * worldmatrix
+        object1.matrix_basis = parentmatrix.inverted() * worldmatrix
+        object1.matrix_world = worldmatrix
+        objBoundsClear(object1.name)
 
 
 #Resize an object in a specific direction.
@@ -420,6 +462,9 @@ def objResize(objname1, resize=(1,1,1)):
         print("resize must contain a 3 number tuple")
         return
         
+    if batchRecord("objResize", objname1, tuple(resize)) == True:
+        return
+        
     if resize[0] >= 0:
         object1.scale[0] = resize[0]
         
@@ -448,6 +493,9 @@ def objSetMaterial(objname1, color=(1,1,1), transparency=1):
         print("Bad parameter in objSetMaterial: " + str(objname1) + ", " + str(color) + ", " + str(transparency))
         print("transparency must be a number not less than 0")
         return
+        
+    if batchRecord("objSetMaterial", objname1, tuple(color), transparency) == True:
+        return
     
     tempmaterial = "material-" + objname1    
         
@@ -479,10 +527,7 @@ def objAddPlane(objname1, resize=(1,1,1)):
         return
     
     objUnSelect()
-    bpy.ops.mesh.primitive_plane_add(radius=.5, location=(0, 0, 0))
-    bpy.ops.transform.resize(value=(resize[0], resize[1], resize[2]))
-    for obj in bpy.context.selected_objects:
-        obj.name = objname1
+    objAddPrimitive(objname1, ('PLANE', 0, 0, 0), resize)
         
 
 #Add a cube to the scene with name and size.        
@@ -498,10 +543,7 @@ def objAddCube(objname1, resize=(1,1,1)):
         return
     
     objUnSelect()
-    bpy.ops.mesh.primitive_cube_add(radius=.5, location=(0, 0, 0))
-    bpy.ops.transform.resize(value=(resize[0], resize[1], resize[2]))
-    for obj in bpy.context.selected_objects:
-        obj.name = objname1
+    objAddPrimitive(objname1, ('CUBE', 0, 0, 0), resize)
 
 
 #Add a circle to the scene with name and size.
@@ -522,10 +564,7 @@ def objAddCircle(objname1, resize=(1,1,1), vertices=32):
         return
     
     objUnSelect()
-    bpy.ops.mesh.primitive_circle_add(radius=.5, vertices=vertices, location=(0, 0, 0))
-    bpy.ops.transform.resize(value=(resize[0], resize[1], resize[2]))
-    for obj in bpy.context.selected_objects:
-        obj.name = objname1
+    objAddPrimitive(objname1, ('CIRCLE', vertices, 0, 0), resize)
 
 
 #Add a cylinder to the scene with name and size.
@@ -554,12 +593,14 @@ def objAddCylinder(objname1, resize=(1,1,1), vertices=32, r1=.5, r2=.5):
         print("Bad parameter in objAddCylinder: " + str(objname1) + ", " + str(resize) + ", " + str(vertices) + ", " + str(r1) + ", " + str(r2))
         print("radius2 must be a number not less than 0")
         return
+        
+    if r1 == 0 and r2 == 0:
+        print("Bad parameter in objAddCylinder: " + str(objname1) + ", " + str(resize) + ", " + str(vertices) + ", " + str(r1) + ", " + str(r2))
+        print("radius1 and radius2 can not both be 0")
+        return
 
     objUnSelect()
-    bpy.ops.mesh.primitive_cone_add(radius1=r1, radius2=r2, depth=1, vertices=vertices, location=(0, 0, 0))
-    bpy.ops.transform.resize(value=(resize[0], resize[1], resize[2]))
-    for obj in bpy.context.selected_objects:
-        obj.name = objname1
+    objAddPrimitive(objname1, ('CONE', vertices, r1, r2), resize)
 
 
 #Add a uv sphere to the scene with name and size.
@@ -575,10 +616,7 @@ def objAddSphereUV(objname1, resize=(1,1,1)):
         return
     
     objUnSelect()
-    bpy.ops.mesh.primitive_uv_sphere_add(size=.5, location=(0, 0, 0))
-    bpy.ops.transform.resize(value=(resize[0], resize[1], resize[2]))
-    for obj in bpy.context.selected_objects:
-        obj.name = objname1
+    objAddPrimitive(objname1, ('SPHEREUV', 0, 0, 0), resize)
 
 
 #Add a ico sphere to the scene with name and size.
@@ -594,14 +632,35 @@ def objAddSphereICO(objname1, resize=(1,1,1)):
         return
 
     objUnSelect()
-    bpy.ops.mesh.primitive_ico_sphere_add(size=.5, location=(0, 0, 0))
-    bpy.ops.transform.resize(value=(resize[0], resize[1], resize[2]))
-    for obj in bpy.context.selected_objects:
-        obj.name = objname1
+    objAddPrimitive(objname1, ('SPHEREICO', 0, 0, 0), resize)
 
 #=================================================
 #Get location of objects.
 
+#Returns min, max and mid points of an object from one pass over its vertices.  Bounds are cached until the object moves or its mesh changes.
+def objBounds(objname1):
+    batchFlush()
+    object1 = objReturnByName(objname1)
+    if object1 == None:
+        print("Bad parameter in objBounds: " + str(objname1))
+        print("objname1 does not exists")
+        return
+        
+    if len(object1.data.vertices) == 0:
+        print("Bad parameter in objBounds: " + str(objname1))
+        print("objname1 has no vertices")
+        return
+        
+    state = objBoundsState(object1)
+    cached = boundscache.get(objname1)
+    if cached != None and cached[0] == state:
+        return cached[1]
+        
+    bounds = pointBounds(objWorldVertices(object1))
+    boundscache[objname1] = (state, bounds)
+    return bounds
+    
+    
 #Read each vertex of an object and determin Max value.
 def objMax(objname1):
     if objReturnByName(objname1) == None:
@@ -609,22 +668,13 @@ def objMax(objname1):
         print("objname1 does not exists")
         return
         
-    wm = bpy.data.objects[objname1].matrix_world
-    tempvert = wm * bpy.data.objects[objname1].data.vertices[0].co
-    maxx = tempvert[0]
-    maxy = tempvert[1]
-    maxz = tempvert[2]
-    
-    for vert in bpy.data.objects[objname1].data.vertices:
-        tempvert = wm * vert.co
-        if tempvert[0] > maxx:
-            maxx = tempvert[0]
-        if tempvert[1] > maxy:
-            maxy = tempvert[1]
-        if tempvert[2] > maxz:
-            maxz = tempvert[2]
-            
-    return (maxx, maxy, maxz)
+    bounds = objBounds(objname1)
+    if bounds == None:
+        print("Bad parameter in objMax: " + str(objname1))
+        print("objname1 has no vertices")
+        return
+        
+    return bounds[1]
         
 
 #Read each vertex of an object and determin Min value.
@@ -634,22 +684,13 @@ def objMin(objname1):
         print("objname1 does not exists")
         return
         
-    wm = bpy.data.objects[objname1].matrix_world
-    tempvert = wm * bpy.data.objects[objname1].data.vertices[0].co
-    minx = tempvert[0]
-    miny = tempvert[1]
-    minz = tempvert[2]
-    
-    for vert in bpy.data.objects[objname1].data.vertices:
-        tempvert = wm * vert.co
-        if tempvert[0] < minx:
-            minx = tempvert[0]
-        if tempvert[1] < miny:
-            miny = tempvert[1]
-        if tempvert[2] < minz:
-            minz = tempvert[2]
-            
-    return (minx, miny, minz)
+    bounds = objBounds(objname1)
+    if bounds == None:
+        print("Bad parameter in objMin: " + str(objname1))
+        print("objname1 has no vertices")
+        return
+        
+    return bounds[0]
     
     
 #Return mid point of an object based on objMax and objMin.
@@ -659,11 +700,13 @@ def objMid(objname1):
         print("objname1 does not exists")
         return
         
-    midx = (objMin(objname1)[0] + objMax(objname1)[0]) / 2
-    midy = (objMin(objname1)[1] + objMax(objname1)[1]) / 2
-    midz = (objMin(objname1)[2] + objMax(objname1)[2]) / 2
-    
-    return (midx, midy, midz)    
+    bounds = objBounds(objname1)
+    if bounds == None:
+        print("Bad parameter in objMid: " + str(objname1))
+        print("objname1 has no vertices")
+        return
+        
+    return bounds[2]
     
 
 #=================================================
@@ -687,21 +730,112 @@ def objModBool(objname1, objname2, operation='DIFFERENCE'):
         print("Bad parameter in objModBool: " + str(objname1) + ", " + str(objname2) + ", " + str(operation))
         print("operation does not exist, use DIFFERENCE  UNION  INTERSECT")
         return
+        
+    if batchRecord("objModBool", objname1, objname2, operation) == True:
+        return
     
-    objUnSelect()
+    if batchstate["applying"] != True:
+        objUnSelect()
+    objSyncMatrix([object1, object2])
     tmpmod = object1.modifiers.new('tempmod', 'BOOLEAN')
     tmpmod.object = object2
     tmpmod.operation = operation.upper()
     bpy.context.scene.objects.active = object1
     bpy.ops.object.modifier_apply(modifier="tempmod")
-    objUnSelect()
-
-
+    objBoundsClear(objname1)
+    if batchstate["applying"] != True:
+        objUnSelect()
+
+
+#Splits boolean cutters into groups whose world space bounds do not touch, keeping their order.  Cutters that overlap would make a merged
+#mesh that crosses itself, which the boolean modifier cuts wrongly.
+def objBoolGroups(objects):
+    groups = []
+    groupbounds = []
+    for obj in objects:
+        if len(obj.data.vertices) == 0:
+            continue
+        co = objWorldVertices(obj)
+        low = co.min(axis=0)
+        high = co.max(axis=0)
+        for group, bounds in zip(groups, groupbounds):
+            if all(numpy.any(high < boundlow) or numpy.any(low > boundhigh) for boundlow, boundhigh in bounds):
+                group.append(obj)
+                bounds.append((low, high))
+                break
+        else:
+            groups.append([obj])
+            groupbounds.append([(low, high)])
+    return groups
+    
+    
+#Perform one boolean operation on an object with many objects.
+#DIFFERENCE and UNION merge cutters into one temporary mesh so the boolean is applied once.  Cutters whose bounds overlap are merged into
+#separate meshes, see objBoolGroups, so the boolean is applied once for each group.  INTERSECT stacks one modifier per cutter and applies them in order.
+def objModBoolMany(objname1, objnames, operation='DIFFERENCE'):
+    object1 = objReturnByName(objname1)
+    if object1 == None:
+        print("Bad parameter in objModBoolMany: " + str(objname1) + ", " + str(objnames) + ", " + str(operation))
+        print("objname1 does not exist")
+        return
+        
+    if isinstance(objnames, (list, tuple)) != True or len(objnames) == 0:
+        print("Bad parameter in objModBoolMany: " + str(objname1) + ", " + str(objnames) + ", " + str(operation))
+        print("objnames must be a list of object names")
+        return
+        
+    objects = [objReturnByName(objname) for objname in objnames]
+    if None in objects:
+        print("Bad parameter in objModBoolMany: " + str(objname1) + ", " + str(objnames) + ", " + str(operation))
+        print("objnames contains an object that does not exist")
+        return
+    
+    if operation.upper() not in ['DIFFERENCE','UNION','INTERSECT']:
+        print("Bad parameter in objModBoolMany: " + str(objname1) + ", " + str(objnames) + ", " + str(operation))
+        print("operation does not exist, use DIFFERENCE  UNION  INTERSECT")
+        return
+        
+    if batchRecord("objModBoolMany", objname1, list(objnames), operation) == True:
+        return
+        
+    if batchstate["applying"] != True:
+        objUnSelect()
+    bpy.context.scene.objects.active = object1
+    objSyncMatrix([object1] + objects)
+    if operation.upper() == 'INTERSECT':
+        for index, obj in enumerate(objects):
+            tmpmod = object1.modifiers.new('tempmod' + str(index), 'BOOLEAN')
+            tmpmod.object = obj
+            tmpmod.operation = 'INTERSECT'
+        for index in range(len(objects)):
+            bpy.ops.object.modifier_apply(modifier='tempmod' + str(index))
+            
+    else:
+        #Cutters are merged in world space, so the merged object stays at the origin.
+        for group in objBoolGroups(objects):
+            tempmesh = objMergedMesh("tempboolmany", group)
+            tempobject = bpy.data.objects.new("tempboolmany", tempmesh)
+            bpy.context.scene.objects.link(tempobject)
+            tmpmod = object1.modifiers.new('tempmod', 'BOOLEAN')
+            tmpmod.object = tempobject
+            tmpmod.operation = operation.upper()
+            bpy.ops.object.modifier_apply(modifier="tempmod")
+            bpy.context.scene.objects.unlink(tempobject)
+            bpy.data.objects.remove(tempobject)
+            bpy.data.meshes.remove(tempmesh)
+        
+    objCacheClear()
+    objBoundsClear(objname1)
+    if batchstate["applying"] != True:
+        objUnSelect()
+    
+    
 #=================================================
 #Get and Set objects location and orientation.  Helps create an object in the same location as another object.
 
 #Gets object location and orientation in world.
 def getLocOri(objname1=""):
+    batchFlush()
     object1 = objReturnByName(objname1)
     if object1 == None or objname1 == "":
         print("Bad parameter in getLocOri:  " + str(objname1))
@@ -715,6 +849,7 @@ def getLocOri(objname1=""):
 
 #Sets object location and orientation in world.
 def setLocOri(objname1="", locori=(0,0,0,0,0,0,'XYZ')):
+    batchFlush()
     object1 = objReturnByName(objname1)
     if object1 == None or objname1 == "":
         print("Bad parameter in setLocOri:  " + str(objname1))
@@ -734,12 +869,250 @@ def setLocOri(objname1="", locori=(0,0,0,0,0,0,'XYZ')):
 
     
 
+#=================================================
+#Batch.  Move, rotate, resize, material and boolean calls made inside a with bt.batch() statement are saved in a plan
+#and applied together at the end, so selection and the scene update are only done once.
+
+#Deferred calls as (function name, arguments), in the order they were made.
+batchplan = []
+
+#Open batch statements, and if the plan is being applied.
+batchstate = {"depth": 0, "applying": False}
+
+
+#Saves a call in the batch plan.  Returns True if a batch is open and the call was deferred.  Callers pass copies of list arguments,
+#so changing a list after the call does not change the saved call.
+def batchRecord(functname, *args):
+    if batchstate["depth"] == 0 or batchstate["applying"] == True:
+        return False
+    batchplan.append((functname, args))
+    return True
+    
+    
+#Applies the batch plan in order.  Called at the end of a batch and by every function that reads or sets objects outside the plan,
+#like objBounds, setLocOri, objDelete and the exports.
+#Selected objects are unselected for the plan and selected again after it.
+def batchFlush():
+    if len(batchplan) == 0 or batchstate["applying"] == True:
+        return
+        
+    plan = list(batchplan)
+    del batchplan[:]
+    selected = [ob for ob in bpy.data.objects if ob.select == True]
+    for ob in selected:
+        ob.select = False
+        
+    batchstate["applying"] = True
+    try:
+        for functname, args in plan:
+            globals()[functname](*args)
+    finally:
+        batchstate["applying"] = False
+        for ob in selected:
+            ob.select = True
+        bpy.context.scene.update()
+        
+        
+#Defers move, rotate, resize, material and boolean calls until the end of the with statement.  Batches can be nested, the plan is applied when the
+#outermost one ends.  If the with statement raises an error the plan is dropped.
+#with bt.batch():
+#    bt.objMove("mypart", (10, 0, 0))
+#    bt.objModBool("mypart", "mybolt", 'DIFFERENCE')
+@contextlib.contextmanager
+def batch():
+    batchstate["depth"] = batchstate["depth"] + 1
+    try:
+        yield
+    except BaseException:
+        batchstate["depth"] = batchstate["depth"] - 1
+        if batchstate["depth"] == 0:
+            del batchplan[:]
+        raise
+        
+    batchstate["depth"] = batchstate["depth"] - 1
+    if batchstate["depth"] == 0:
+        batchFlush()
+        
+        
+#=================================================
+#Part Cache.  Saves the mesh a part function makes so it is only rebuilt when the part changes.
+
+#Most part meshes kept in the blend file.  The least recently used part is dropped when there are more.
+partcachesize = 32
+
+#Part mesh names, least recently used first.
+partcache = collections.OrderedDict()
+partcachestats = {"hits": 0, "misses": 0}
+
+#What each part function returned, by part mesh name.  Each entry is ("object", None), ("name", None) or ("value", result).
+partresults = {}
+
+
+#Returns the mesh name a part function call is saved under.  Made from the function source, its arguments after the object name and
+#the plain values (numbers, strings, tuples, lists) of globals it reads, like platethin in example.py.
+def partKey(funct, args, kwargs):
+    try:
+        source = inspect.getsource(funct)
+    except (IOError, TypeError):
+        source = repr(funct.__code__.co_code) + repr(funct.__code__.co_consts)
+        
+    values = []
+    for name in sorted(set(funct.__code__.co_names)):
+        value = funct.__globals__.get(name)
+        if isinstance(value, (bool, int, float, str, tuple, list)):
+            values.append((name, value))
+            
+    keytext = repr((source, args, sorted(kwargs.items()), values))
+    return "OpenBTCAD-part-" + hashlib.sha1(keytext.encode('utf-8')).hexdigest()
+    
+    
+#Marks a part mesh as used and drops the least recently used part meshes past partcachesize.
+def partCacheUse(meshname):
+    #Part meshes saved in the blend file by an earlier session are picked up the first time.
+    if len(partcache) == 0:
+        for mesh in bpy.data.meshes:
+            if mesh.name.startswith("OpenBTCAD-part-"):
+                partcache[mesh.name] = True
+                
+    partcache[meshname] = True
+    partcache.move_to_end(meshname)
+    while len(partcache) > partcachesize:
+        oldname = partcache.popitem(last=False)[0]
+        partresults.pop(oldname, None)
+        oldmesh = bpy.data.meshes.get(oldname)
+        if oldmesh != None:
+            oldmesh.use_fake_user = False
+            if oldmesh.users == 0:
+                bpy.data.meshes.remove(oldmesh)
+                
+                
+#Part function decorator.  The first argument of the part function must be the object name.
+#The first call builds the part and saves a copy of its mesh in the blend file.  Later calls with the same part give the object a copy of the saved mesh.
+#@bt.partCache
+#def mysimplepart(objname):
+def partCache(funct):
+    @functools.wraps(funct)
+    def cachedpart(objname1, *args, **kwargs):
+        batchFlush()
+        meshname = partKey(funct, args, kwargs)
+        savedmesh = bpy.data.meshes.get(meshname)
+        if savedmesh == None:
+            partcachestats["misses"] = partcachestats["misses"] + 1
+            result = funct(objname1, *args, **kwargs)
+            object1 = objReturnByName(objname1)
+            if object1 != None:
+                savedmesh = object1.data.copy()
+                savedmesh.name = meshname
+                savedmesh.use_fake_user = True
+                savedmesh["OpenBTCAD-scale"] = tuple(object1.scale)
+                savedmesh["OpenBTCAD-matrix"] = [value for row in object1.matrix_basis for value in row]
+                partCacheUse(savedmesh.name)
+            #The object and its name are saved as markers, so a hit returns the object or name of that call.
+            if object1 != None and isinstance(result, type(object1)) and result == object1:
+                partresults[meshname] = ("object", None)
+            elif isinstance(result, str) and result == objname1:
+                partresults[meshname] = ("name", None)
+            else:
+                partresults[meshname] = ("value", result)
+            return result
+            
+        partcachestats["hits"] = partcachestats["hits"] + 1
+        partCacheUse(meshname)
+        object1 = objReturnByName(objname1)
+        if object1 == None:
+            object1 = bpy.data.objects.new(objname1, savedmesh.copy())
+            bpy.context.scene.objects.link(object1)
+        else:
+            oldmesh = object1.data
+            object1.data = savedmesh.copy()
+            if oldmesh.users == 0:
+                bpy.data.meshes.remove(oldmesh)
+        object1.data.name = objname1
+        object1.data.use_fake_user = False
+        #Parts saved before the whole matrix was kept only have their scale.
+        if "OpenBTCAD-matrix" in savedmesh:
+            values = list(savedmesh["OpenBTCAD-matrix"])
+            object1.matrix_basis = mathutils.Matrix([values[0:4], values[4:8], values[8:12], values[12:16]])
+        else:
+            object1.scale = tuple(savedmesh["OpenBTCAD-scale"])
+        object1.matrix_world = objWorldMatrix(object1)
+        objBoundsClear(objname1)
+        
+        kind, result = partresults.get(meshname, ("value", None))
+        if kind == "object":
+            return object1
+        if kind == "name":
+            return objname1
+        return result
+        
+    return cachedpart
+    
+    
+#Removes every saved part mesh so all parts are rebuilt.
+def partCacheClear():
+    for meshname in list(partcache.keys()) + [mesh.name for mesh in bpy.data.meshes if mesh.name.startswith("OpenBTCAD-part-")]:
+        oldmesh = bpy.data.meshes.get(meshname)
+        if oldmesh != None:
+            oldmesh.use_fake_user = False
+            if oldmesh.users == 0:
+                bpy.data.meshes.remove(oldmesh)
+    partcache.clear()
+    partresults.clear()
+    
+    
+#Returns part cache hits, misses and size.
+def partCacheStats():
+    return {"hits": partcachestats["hits"], "misses": partcachestats["misses"], "size": len(partcache)}
+    
+    
 #=================================================
 #Object Export
 
+#Returns the names of the mesh objects an export writes, the named object or all mesh objects if none is specified.
+def objExportNames(objname1=""):
+    if objname1 != "":
+        return [ob.name for ob in bpy.data.objects if ob.type == 'MESH' and ob.name == objname1]
+    else:
+        return [ob.name for ob in bpy.data.objects if ob.type == 'MESH']
+        
+        
+#Yields the world space mesh of each object one at a time and updates the progress bar.
+def objMeshStream(objnames):
+    for objindex, objnametemp in enumerate(objnames):
+        bpy.context.window_manager.progress_update(objindex)
+        yield objMesh(objReturnByName(objnametemp))
+        
+        
+#bt.objSliceLayers("insideclamp", [0, 1.5, 3])
+#Returns cross sections of an object at each Z height, one line list per height.  Line lists are the same as objLineList.
+def objSliceLayers(objname1, zvalues=(0,)):
+    batchFlush()
+    object1 = objReturnByName(objname1)
+    if object1 == None:
+        print("Bad parameter in objSliceLayers:  " + str(objname1) + ", " + str(zvalues))
+        print("objname1 does not exist")
+        return
+        
+    if isinstance(zvalues, (list, tuple)) != True:
+        print("Bad parameter in objSliceLayers:  " + str(objname1) + ", " + str(zvalues))
+        print("zvalues must be a list or tuple of Z heights")
+        return
+        
+    return sliceLayers(objMesh(object1), zvalues)
+    
+    
 #bt.objExportSCAD("insideclamp", "/home/greendude/mystuff/projects/pipecnc/PipeCNC125/exp/")
 #STL-Export object with specific name or all objects if none are specified(MESH Only).
-def objExportSCAD(objname1="", dirpath="", ascii=False, projection=False, cut=False):
+#STL files are written straight from each object's world space mesh without selecting objects.
+#processes other than 1 writes the STL files in a process pool, None uses one process per core.
+#incremental=True only rewrites STL files of objects whose world space mesh changed since the last export, see objects.manifest.
+def objExportSCAD(objname1="", dirpath="", ascii=False, projection=False, cut=False, processes=1, incremental=False):
+    batchFlush()
+    if processes != None and (isinstance(processes, int) != True or processes < 1):
+        print("Bad parameter in objExportSCAD: " + str(objname1) + ", " + str(processes))
+        print("processes must be None or a number greater than 0")
+        return
+        
     if objReturnByName(objname1) == None and objname1 != "":
         print("Bad parameter in objExportSCAD:  " + str(objname1) + ", " + str(dirpath))
         print("objname1 does not exist")
@@ -750,68 +1123,57 @@ def objExportSCAD(objname1="", dirpath="", ascii=False, projection=False, cut=Fa
         print("dirpath must be added")
         return
         
-    objUnSelect()
     f = open((dirpath + "objects.scad"), 'w')
+    objnames = objExportNames(objname1)
     
-    for ob in bpy.data.objects:
-        if ob.type == 'MESH' and ob.name == objname1:
-            ob.select = True
-            if projection == True:
-                if cut == True:
-                    f.write('projection(cut = true)import("' + ob.name + '.stl", convexity=3);\n')
-                else:
-                    f.write('projection(cut = false)import("' + ob.name + '.stl", convexity=3);\n')
-            else:
-                f.write('import("' + ob.name + '.stl", convexity=3);\n')
-                
-            bpy.ops.export_mesh.stl(filepath=(dirpath + ob.name + ".stl"), check_existing=False, ascii=ascii)
-            ob.select = False
-            
-        elif ob.type == 'MESH' and objname1 == "":
-            ob.select = True
-            if projection == True:
-                if cut == True:
-                    f.write('projection(cut = true)import("' + ob.name + '.stl", convexity=3);\n')
-                else:
-                    f.write('projection(cut = false)import("' + ob.name + '.stl", convexity=3);\n')
+    for objnametemp in objnames:
+        if projection == True:
+            if cut == True:
+                f.write('projection(cut = true)import("' + objnametemp + '.stl", convexity=3);\n')
             else:
-                f.write('import("' + ob.name + '.stl", convexity=3);\n')
-            
-            bpy.ops.export_mesh.stl(filepath=(dirpath + ob.name + ".stl"), check_existing=False, ascii=ascii)
-            ob.select = False
+                f.write('projection(cut = false)import("' + objnametemp + '.stl", convexity=3);\n')
+        else:
+            f.write('import("' + objnametemp + '.stl", convexity=3);\n')
             
     f.close()
     
+    bpy.context.window_manager.progress_begin(0, len(objnames))
+    filepaths = [dirpath + objnametemp + ".stl" for objnametemp in objnames]
+    if incremental == True:
+        exportSTLIncremental(objnames, objMeshStream(objnames), filepaths, dirpath + "objects.manifest", ascii, processes)
+    else:
+        exportSTL(objMeshStream(objnames), filepaths, ascii, processes)
+    bpy.context.window_manager.progress_end()
+    
     
     
     
 # bt.objExportDXF("Cube", "/home/greendude/testnlm.dxf")
 # bt.objExportDXF("insideclamp", "/home/greendude/testnlm.dxf")
 #Exports a single object as a dxf or all objects if not specified.
-def objExportDXF(objname1="", filepath="", cut=True):
-    def exportdxf(objname1=objname1, filepath=filepath, cut=cut):
-        linelist = objLineList(objname1)
-        linelist2 = SortLineList(linelist)
-        
-        for itm in linelist2:
-            if itm != "NewLineSet":
-                dxfAddLine(filepath, (itm[0],itm[1],itm[2],itm[3]))
-        
-        
+#processes other than 1 slices and chains the objects in a process pool, None uses one process per core.
+#incremental=True reuses the dxf lines of objects whose world space mesh did not change since the last export, see filepath + ".manifest".
+#polylines=True writes each contour as one POLYLINE with straight runs merged.  Lines closer than tolerance are joined into one contour.
+#segments writes a SegmentBuffer or SortLineList output instead of slicing objects.
+#cachedir keeps each object's cross section in a memory mapped slice cache, objects already in it are not sliced again.
+def objExportDXF(objname1="", filepath="", cut=True, processes=1, incremental=False, polylines=False, tolerance=.0001, segments=None,
+                 cachedir=None):
+    batchFlush()
+    if processes != None and (isinstance(processes, int) != True or processes < 1):
+        print("Bad parameter in objExportDXF: " + str(objname1) + ", " + str(processes))
+        print("processes must be None or a number greater than 0")
+        return
         
-    dxfOpen(filepath) #Write DXF Header
-    
-    #Call once for each object.
-    if objname1 != "":
-        for ob in bpy.data.objects:
-            if ob.type == 'MESH' and ob.name == objname1:
-                exportdxf(ob.name, filepath, cut)
+    if segments != None:
+        exportDXF([SegmentBuffer.fromLineList(segments)], filepath, 1, polylines, tolerance)
+        return
+    objnames = objExportNames(objname1)
+    bpy.context.window_manager.progress_begin(0, len(objnames))
+    if incremental == True:
+        exportDXFIncremental(objnames, objMeshStream(objnames), filepath, processes, polylines, tolerance)
     else:
-        for ob in bpy.data.objects:
-            if ob.type == 'MESH':
-                exportdxf(ob.name, filepath, cut)
-
-    dxfClose(filepath) #Close the DXF file.
+        exportDXF(objMeshStream(objnames), filepath, processes, polylines, tolerance, cachedir)
+    bpy.context.window_manager.progress_end()
 
 
 
@@ -819,40 +1181,152 @@ def objExportDXF(objname1="", filepath="", cut=True):
 
 #bt.objExportGCODE("Cube", "/home/graydude/testfile.gcode")
 #Exports a single object as gcode or all objects if not specified.
-def objExportGCODE(objname1="", filepath="", cut=True, roundvalues=5):
-    def exportgcode(objnametemp, filepath=filepath, cut=cut, roundvalues=roundvalues):
-        
-        linelist = objLineList(objnametemp)
-        linelist2 = SortLineList(linelist)
-        
-        newlineset = False
-        for itm in linelist2:
-            if newlineset == True:
-                newlineset = False
-                gcodeAddText(filepath, "toolup")
-                gcodeAddPoint(filepath, (round(itm[0], roundvalues), round(itm[1], roundvalues)))
-                gcodeAddText(filepath, "tooldown")
-                
-            if itm == "NewLineSet":
-                newlineset = True
-                continue
-            else:
-                gcodeAddPoint(filepath, (round(itm[2], roundvalues), round(itm[3], roundvalues)))
+#Each object is sliced, chained and formatted as a stream of line sets, so only one object is held in memory at a time.
+#processes other than 1 slices and chains the objects in a process pool, None uses one process per core.
+#incremental=True reuses the gcode of objects whose world space mesh did not change since the last export, see filepath + ".manifest".
+#polylines=True merges straight runs into one move.  Lines closer than tolerance are joined into one contour.
+#optimize=True orders the contours of every object to cut down tool up travel, spending up to timelimit seconds on it.
+#Returns (travel before, travel after).  optimize needs every object at once, so it always does a full export.
+#segments writes a SegmentBuffer or SortLineList output instead of slicing objects.
+#cachedir keeps each object's cross section in a memory mapped slice cache, objects already in it are not sliced again.
+def objExportGCODE(objname1="", filepath="", cut=True, roundvalues=5, processes=1, incremental=False, polylines=False, tolerance=.0001,
+                   optimize=False, timelimit=1.0, segments=None, cachedir=None):
+    batchFlush()
+    if processes != None and (isinstance(processes, int) != True or processes < 1):
+        print("Bad parameter in objExportGCODE: " + str(objname1) + ", " + str(processes))
+        print("processes must be None or a number greater than 0")
+        return
+        
+    if segments != None:
+        return exportGCODE([SegmentBuffer.fromLineList(segments)], filepath, roundvalues, 1, polylines, tolerance, optimize, timelimit)
+    objnames = objExportNames(objname1)
+    bpy.context.window_manager.progress_begin(0, len(objnames))
+    travel = None
+    if optimize == True:
+        travel = exportGCODE(objMeshStream(objnames), filepath, roundvalues, processes, polylines, tolerance, True, timelimit, cachedir)
+    elif incremental == True:
+        exportGCODEIncremental(objnames, objMeshStream(objnames), filepath, roundvalues, processes, polylines, tolerance)
+    else:
+        exportGCODE(objMeshStream(objnames), filepath, roundvalues, processes, polylines, tolerance, False, 1.0, cachedir)
+    bpy.context.window_manager.progress_end()
+    return travel
+    
+    
+    
+    
+#=================================================
+#Profiling.  Records calls, time, mesh sizes and bytes written for OpenBTCAD functions while a Profile is running.
+#Functions are only wrapped inside the with statement, so OpenBTCAD runs at full speed without a Profile.
+
+#Returns the names of the OpenBTCAD functions a Profile records.
+def profileNames():
+    return sorted(name for name, value in globals().items() if inspect.isfunction(value) and inspect.isgeneratorfunction(value) != True and
+                  value.__module__ == __name__ and (name.startswith("obj") or name.startswith("export") or name == "SortLineList"))
+                  
+                  
+#Returns the files a call may write, found from its filepath, filepaths or dirpath parameters, with their size and change time.
+def profileFiles(funct, args, kwargs):
+    try:
+        params = inspect.signature(funct).bind(*args, **kwargs).arguments
+    except TypeError:
+        return {}
+    filepaths = []
+    if isinstance(params.get("filepath"), str):
+        filepaths.append(params["filepath"])
+    if isinstance(params.get("filepaths"), (list, tuple)):
+        filepaths.extend(params["filepaths"])
+    if isinstance(params.get("dirpath"), str) and os.path.isdir(params["dirpath"]):
+        filepaths.extend(os.path.join(params["dirpath"], filename) for filename in os.listdir(params["dirpath"]))
+        
+    files = {}
+    for filepath in filepaths:
+        if os.path.isfile(filepath):
+            files[filepath] = (os.stat(filepath).st_size, os.stat(filepath).st_mtime_ns)
+        else:
+            files[filepath] = None
+    return files
+    
+    
+#Returns the bytes in files that are new or changed since profileFiles was called before a call.
+def profileBytes(funct, args, kwargs, oldfiles):
+    written = 0
+    for filepath, state in profileFiles(funct, args, kwargs).items():
+        if state != None and oldfiles.get(filepath) != state:
+            written = written + state[0]
+    return written
+    
+    
+#Records OpenBTCAD calls made inside a with statement.  The stats are written to filepath as JSON at the end if one is given.
+#with bt.Profile("/home/myusername/profile.json") as prof:
+#    bt.objExportDXF("", "/home/myusername/parts.dxf")
+#print(prof.report())
+class Profile:
+    def __init__(self, filepath=""):
+        self.filepath = filepath
+        self.stats = {}
+        self.stack = []
+        self.originals = {}
+        
+    def __enter__(self):
+        for name in profileNames():
+            self.originals[name] = globals()[name]
+            globals()[name] = self.wrap(name, globals()[name])
+        return self
+        
+    def __exit__(self, exctype, excvalue, traceback):
+        globals().update(self.originals)
+        self.originals = {}
+        if self.filepath != "":
+            self.dump(self.filepath)
+        return False
+        
+    #Returns funct wrapped so each call is added to stats.
+    def wrap(self, name, funct):
+        @functools.wraps(funct)
+        def profiled(*args, **kwargs):
+            record = {"vertices": 0, "polygons": 0, "meshes": 0}
+            self.stack.append(record)
+            oldfiles = profileFiles(funct, args, kwargs)
+            start = time.perf_counter()
+            try:
+                result = funct(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                self.stack.pop()
                 
+            #Meshes read by objMesh count for every call they were read in.  Other calls count the object named by their first parameter,
+            #except objReturnByName which only looks objects up.
+            if name == "objMesh":
+                for entry in self.stack + [record]:
+                    entry["vertices"] = entry["vertices"] + len(result.co)
+                    entry["polygons"] = entry["polygons"] + len(result.looptotal)
+                    entry["meshes"] = entry["meshes"] + 1
+            elif name != "objReturnByName" and record["meshes"] == 0 and len(args) > 0 and isinstance(args[0], str):
+                object1 = bpy.data.objects.get(args[0])
+                if object1 != None and object1.type == 'MESH':
+                    record["vertices"] = len(object1.data.vertices)
+                    record["polygons"] = len(object1.data.polygons)
                     
-                    
-    gcodeOpen(filepath) #Write GCode Header
-    
-    #Call once for each object.
-    if objname1 != "":
-        for ob in bpy.data.objects:
-            if ob.type == 'MESH' and ob.name == objname1:
-                exportgcode(ob.name, filepath, cut)
-    else:
-        for ob in bpy.data.objects:
-            if ob.type == 'MESH':
-                exportgcode(ob.name, filepath, cut)
+            stat = self.stats.setdefault(name, {"calls": 0, "seconds": 0.0, "vertices": 0, "polygons": 0, "bytes": 0})
+            stat["calls"] = stat["calls"] + 1
+            stat["seconds"] = stat["seconds"] + seconds
+            stat["vertices"] = stat["vertices"] + record["vertices"]
+            stat["polygons"] = stat["polygons"] + record["polygons"]
+            stat["bytes"] = stat["bytes"] + profileBytes(funct, args, kwargs, oldfiles)
+            return result
+            
+        return profiled
         
+    #Returns a table of the recorded functions, slowest first.  Seconds include the time of OpenBTCAD functions called inside.
+    def report(self):
+        lines = ["%-24s %8s %12s %12s %12s %12s" % ("function", "calls", "seconds", "vertices", "polygons", "bytes")]
+        for name in sorted(self.stats, key=lambda name: self.stats[name]["seconds"], reverse=True):
+            stat = self.stats[name]
+            lines.append("%-24s %8d %12.4f %12d %12d %12d" % (name, stat["calls"], stat["seconds"], stat["vertices"], stat["polygons"], stat["bytes"]))
+        return "\n".join(lines)
         
-    gcodeAddText(filepath, "toolup")
-    gcodeClose(filepath) #Close the GCode file.
+    #Writes the recorded stats to a JSON file.
+    def dump(self, filepath):
+        f = open(filepath, 'w')
+        json.dump(self.stats, f, indent=1, sort_keys=True)
+        f.close()
@@ -0,0 +1,1622 @@
+#Name: OpenBTCAD Core V0.0.6
+#Author: Nathan Meronek
+#Date: 2016.02.03
+#Description: Geometry and file functions of OpenBTCAD that do not need blender.  Meshes are numpy arrays, so slicing, bounds and exports can run
+#             in a normal Python shell on meshes loaded from STL or OBJ files.  openbtcad.py reads blender objects into these meshes.
+
+#=================================================
+#Imports
+
+import collections
+import functools
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import time
+import numpy
+
+
+#=================================================
+#DXF File Functions
+
+#Text written at the start and end of a dxf file.
+DXFHEADER = '  0\nSECTION\n  2\nBLOCKS\n  0\nENDSEC\n  0\nSECTION\n  2\nENTITIES\n'
+DXFFOOTER = '  0\nENDSEC\n  0\nSECTION\n  2\nOBJECTS\n  0\nDICTIONARY\n  0\nENDSEC\n  0\nEOF\n'
+
+
+#Returns dxf text for a line.
+def dxfLineText(line=(0, 0, 0, 0)):
+    return ('  0\nLINE\n  8\n0\n'
+            ' 10\n' + str(line[0]) + '\n'
+            ' 11\n' + str(line[2]) + '\n'
+            ' 20\n' + str(line[1]) + '\n'
+            ' 21\n' + str(line[3]) + '\n')
+
+
+#Returns dxf text for a polyline.  points is a list of (x,y) points, a closed polyline does not repeat its first point at the end.
+#The file has no version header, so readers take it as R12.  R12 has no LWPOLYLINE, so this is a POLYLINE with a VERTEX for each point and a SEQEND.
+def dxfPolylineText(points, closed=False):
+    return ('  0\nPOLYLINE\n  8\n0\n 66\n1\n 10\n0.0\n 20\n0.0\n 30\n0.0\n'
+            ' 70\n' + ('1' if closed == True else '0') + '\n' +
+            ''.join('  0\nVERTEX\n  8\n0\n 10\n' + str(point[0]) + '\n 20\n' + str(point[1]) + '\n 30\n0.0\n' for point in points) +
+            '  0\nSEQEND\n  8\n0\n')
+            
+            
+#Yields dxf text for each line set.  With polylines=True each line set is one polyline with its straight runs merged, otherwise each line is a LINE.
+def dxfLineSetText(linesets, polylines=False, tolerance=.0001):
+    for lineset in linesets:
+        if polylines == True:
+            yield dxfPolylineText(*lineSetPolyline(lineset, tolerance))
+        else:
+            for line in lineset:
+                yield dxfLineText(line)
+                
+                
+#Writes a dxf file through one open file.  Entities are collected in a buffer and written chunksize at a time.
+#with bt.DxfWriter("/home/greendude/testnlm.dxf") as dxf:
+#    dxf.addLines(linelist)
+class DxfWriter:
+    def __init__(self, filepath, chunksize=1000):
+        self.filepath = filepath
+        self.chunksize = chunksize
+        self.buffer = []
+        self.f = None
+        
+    #Open dxf file and write the header.
+    def open(self):
+        self.f = open(self.filepath, 'w')
+        self.f.write(DXFHEADER)
+        return self
+        
+    #Write dxf line.
+    def addLine(self, line=(0, 0, 0, 0)):
+        self.buffer.append(dxfLineText(line))
+        if len(self.buffer) >= self.chunksize:
+            self.flush()
+            
+    #Write each line from a line list or SegmentBuffer.  NewLineSet markers from SortLineList are skipped.
+    def addLines(self, linelist):
+        if isinstance(linelist, SegmentBuffer):
+            linelist = linelist.lines.tolist()
+        for line in linelist:
+            if line != "NewLineSet":
+                self.addLine(line)
+                
+    #Write a polyline of (x,y) points.
+    def addPolyline(self, points, closed=False):
+        self.buffer.append(dxfPolylineText(points, closed))
+        if len(self.buffer) >= self.chunksize:
+            self.flush()
+                
+    #Write the buffer to the file.
+    def flush(self):
+        self.f.write(''.join(self.buffer))
+        self.buffer = []
+        
+    #Write the footer and close dxf file.
+    def close(self):
+        self.flush()
+        self.f.write(DXFFOOTER)
+        self.f.close()
+        self.f = None
+        
+    def __enter__(self):
+        return self.open()
+        
+    def __exit__(self, exctype, excvalue, traceback):
+        self.close()
+
+
+#Open dxf file.
+def dxfOpen(filepath):
+    f = open(filepath, 'w')
+    f.write(DXFHEADER)
+    f.close()
+
+
+#Write dxf line.
+def dxfAddLine(filepath, line=(0, 0, 0, 0)):
+    f = open(filepath, 'a')
+    f.write(dxfLineText(line))
+    f.close()
+
+
+#Close dxf file.
+def dxfClose(filepath):
+    f = open(filepath, 'a')
+    f.write(DXFFOOTER)
+    f.close()
+
+
+#=================================================
+#GCode File Functions
+
+#Text written at the start and end of a gcode file.
+GCODEHEADER = 'GCodeStart \n'
+GCODEFOOTER = 'GCodeEnd \n'
+
+
+#Returns gcode text for a point.
+def gcodePointText(point=(0, 0)):
+    return 'X' + str(point[0]) + ' Y' + str(point[1]) + '\n'
+
+
+#Yields gcode text for each line set.  The tool is raised to move to the start of a line set and lowered to follow it.
+#With polylines=True straight runs are merged into one move and moves that round to the same point are left out.
+def gcodeLineSetText(linesets, roundvalues=5, polylines=False, tolerance=.0001):
+    for lineset in linesets:
+        if polylines == True:
+            points, closed = lineSetPolyline(lineset, tolerance)
+            if closed == True:
+                points = points + points[:1]
+            points = [(round(point[0], roundvalues), round(point[1], roundvalues)) for point in points]
+            yield 'toolup\n'
+            yield gcodePointText(points[0])
+            yield 'tooldown\n'
+            for index in range(1, len(points)):
+                if points[index] != points[index - 1]:
+                    yield gcodePointText(points[index])
+            continue
+            
+        yield 'toolup\n'
+        yield gcodePointText((round(lineset[0][0], roundvalues), round(lineset[0][1], roundvalues)))
+        yield 'tooldown\n'
+        for line in lineset:
+            yield gcodePointText((round(line[2], roundvalues), round(line[3], roundvalues)))
+
+
+#Writes a gcode file through one open file.  Text is collected in a buffer and written chunksize lines at a time.
+#with bt.GcodeWriter("/home/graydude/testfile.gcode") as gcode:
+#    gcode.addPoint((0, 0))
+class GcodeWriter:
+    def __init__(self, filepath, chunksize=1000):
+        self.filepath = filepath
+        self.chunksize = chunksize
+        self.buffer = []
+        self.f = None
+        
+    #Open gcode file and write the header.
+    def open(self):
+        self.f = open(self.filepath, 'w')
+        self.f.write(GCODEHEADER)
+        return self
+        
+    #Write gcode line.
+    def addPoint(self, point=(0, 0)):
+        self.addRaw(gcodePointText(point))
+        
+    #Write gcode text.
+    def addText(self, teststring):
+        self.addRaw(str(teststring) + '\n')
+        
+    #Write text that is already formatted, each item ending in a newline.
+    def addRaw(self, text):
+        self.buffer.append(text)
+        if len(self.buffer) >= self.chunksize:
+            self.flush()
+            
+    #Write every item from an iterable of formatted text, like gcodeLineSetText.
+    def addRawLines(self, textlines):
+        for text in textlines:
+            self.addRaw(text)
+            
+    #Write the buffer to the file.
+    def flush(self):
+        self.f.write(''.join(self.buffer))
+        self.buffer = []
+        
+    #Write the footer and close gcode file.
+    def close(self):
+        self.flush()
+        self.f.write(GCODEFOOTER)
+        self.f.close()
+        self.f = None
+        
+    def __enter__(self):
+        return self.open()
+        
+    def __exit__(self, exctype, excvalue, traceback):
+        self.close()
+
+
+#Open gcode file.
+def gcodeOpen(filepath):
+    f = open(filepath, 'w')
+    f.write(GCODEHEADER)
+    f.close()
+
+
+#Write gcode line.
+def gcodeAddPoint(filepath, point=(0, 0)):
+    f = open(filepath, 'a')
+    f.write(gcodePointText(point))
+    f.close()
+
+
+#Write gcode text.
+def gcodeAddText(filepath, teststring):
+    f = open(filepath, 'a')
+    f.write(str(teststring) + '\n')
+    f.close()
+    
+
+#Close gcode file.
+def gcodeClose(filepath):
+    f = open(filepath, 'a')
+    f.write(GCODEFOOTER)
+    f.close()
+
+
+#=================================================
+#STL File Functions
+
+#Binary STL triangle record.  Normal, three corners and an unused attribute.
+STLTRIANGLE = numpy.dtype([('normal', '<f4', (3,)), ('corners', '<f4', (3, 3)), ('attribute', '<u2')])
+
+
+#Returns 2D corners of a polygon on its own plane, counter clockwise looking down its normal.
+def polygonPlanePoints(points, normal):
+    axis = int(numpy.argmax(numpy.abs(normal)))
+    u, v = ((1, 2), (2, 0), (0, 1))[axis]
+    if normal[axis] < 0:
+        u, v = v, u
+    return [(point[u], point[v]) for point in points.tolist()]
+    
+    
+#Splits a polygon into triangles by cutting off one ear at a time, for polygons a fan would get wrong.
+#points are the corners in order, counter clockwise.  Returns len(points) - 2 triples of corner indices.
+def earClip(points):
+    def cross(a, b, c):
+        return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+        
+    indices = list(range(len(points)))
+    triangles = []
+    while len(indices) > 3:
+        for k in range(len(indices)):
+            a, b, c = indices[k - 1], indices[k], indices[(k + 1) % len(indices)]
+            pa, pb, pc = points[a], points[b], points[c]
+            if cross(pa, pb, pc) <= 0:
+                continue
+            #An ear has no other corner inside it.
+            inside = False
+            for i in indices:
+                point = points[i]
+                if i in (a, b, c) or point == pa or point == pb or point == pc:
+                    continue
+                if cross(pa, pb, point) >= 0 and cross(pb, pc, point) >= 0 and cross(pc, pa, point) >= 0:
+                    inside = True
+                    break
+            if inside == False:
+                triangles.append((a, b, c))
+                del indices[k]
+                break
+        else:
+            #No ear in a degenerate or self crossing polygon, cut off a corner anyway so every polygon gets its triangles.
+            triangles.append((indices[-1], indices[0], indices[1]))
+            del indices[0]
+    triangles.append((indices[0], indices[1], indices[2]))
+    return triangles
+    
+    
+#Returns an (n, 3, 3) array of triangle corners and an (n, 3) array of unit normals.  Convex polygons are split into fans from their
+#first vertex, polygons with a corner turning the other way, like n-gons left by booleans, are split by earClip.
+def meshTriangles(mesh):
+    polyloops = mesh.polygonLoops()
+    offsets = numpy.cumsum(mesh.looptotal) - mesh.looptotal
+    tricount = numpy.maximum(mesh.looptotal - 2, 0)
+    first = numpy.repeat(offsets, tricount)
+    step = numpy.arange(tricount.sum()) - numpy.repeat(numpy.cumsum(tricount) - tricount, tricount)
+    triloops = numpy.column_stack((first, first + step + 1, first + step + 2))
+    
+    #Polygon normals by Newell's method, then the turn at each corner.  A corner turning against the normal makes the polygon concave.
+    bigpolys = numpy.nonzero(mesh.looptotal > 3)[0]
+    if len(bigpolys) > 0:
+        polyindex = numpy.repeat(numpy.arange(len(mesh.looptotal)), mesh.looptotal)
+        loopindex = numpy.arange(len(polyloops))
+        nextloop = numpy.where(loopindex + 1 == (offsets + mesh.looptotal)[polyindex], offsets[polyindex], loopindex + 1)
+        current = mesh.co[polyloops]
+        following = mesh.co[polyloops[nextloop]]
+        newell = numpy.cross(current, following)
+        normals = numpy.zeros((len(mesh.looptotal), 3))
+        numpy.add.at(normals, polyindex, newell)
+        edges = following - current
+        turns = (numpy.cross(edges[numpy.argsort(nextloop)], edges) * normals[polyindex]).sum(axis=1)
+        scale = (edges * edges).sum(axis=1) * numpy.sqrt((normals * normals).sum(axis=1))[polyindex]
+        concave = numpy.zeros(len(mesh.looptotal), dtype=bool)
+        numpy.logical_or.at(concave, polyindex, turns < -1e-9 * scale)
+        concave[mesh.looptotal <= 3] = False
+        tristart = numpy.cumsum(tricount) - tricount
+        for poly in numpy.nonzero(concave)[0].tolist():
+            start = offsets[poly]
+            points = polygonPlanePoints(mesh.co[polyloops[start:start + mesh.looptotal[poly]]], normals[poly])
+            triloops[tristart[poly]:tristart[poly] + tricount[poly]] = numpy.asarray(earClip(points)) + start
+            
+    corners = mesh.co[polyloops[triloops]]
+    normals = numpy.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = numpy.sqrt((normals * normals).sum(axis=1))[:, None]
+    normals = numpy.where(lengths > 0, normals / numpy.where(lengths > 0, lengths, 1), 0)
+    return corners, normals
+    
+    
+#Writes a mesh to a binary or ascii STL file.  Binary triangles are built in one structured array and written with one tofile call.
+def writeSTL(mesh, filepath, ascii=False):
+    corners, normals = meshTriangles(mesh)
+    if ascii == True:
+        f = open(filepath, 'w')
+        f.write('solid Exported from OpenBTCAD\n')
+        for normal, corner in zip(normals.tolist(), corners.tolist()):
+            f.write('facet normal %f %f %f\nouter loop\n' % tuple(normal))
+            f.write('vertex %f %f %f\nvertex %f %f %f\nvertex %f %f %f\n' % tuple(corner[0] + corner[1] + corner[2]))
+            f.write('endloop\nendfacet\n')
+        f.write('endsolid Exported from OpenBTCAD\n')
+        f.close()
+        
+    else:
+        triangles = numpy.zeros(len(corners), dtype=STLTRIANGLE)
+        triangles['normal'] = normals
+        triangles['corners'] = corners
+        f = open(filepath, 'wb')
+        f.write(b'Exported from OpenBTCAD'.ljust(80, b' '))
+        f.write(numpy.array([len(triangles)], dtype='<u4').tobytes())
+        triangles.tofile(f)
+        f.close()
+        
+        
+#Calls writeSTL with a (mesh, filepath, ascii) tuple.  Used by process pool workers.
+def writeSTLJob(job):
+    writeSTL(job[0], job[1], job[2])
+    return job[1]
+    
+    
+#=================================================
+#Mesh and Transform
+
+#4x4 transform matrix, like an object's matrix_world.
+class Transform:
+    def __init__(self, matrix=None):
+        if matrix is None:
+            matrix = numpy.identity(4)
+        self.matrix = numpy.array(matrix, dtype=numpy.float64).reshape(4, 4)
+        
+    #Returns the transform that applies other first, then this one.
+    def __mul__(self, other):
+        return Transform(numpy.dot(self.matrix, other.matrix))
+        
+    #Returns an array of points moved by the transform.
+    def apply(self, co):
+        return numpy.dot(numpy.asarray(co, dtype=numpy.float64).reshape(-1, 3), self.matrix[:3, :3].T) + self.matrix[:3, 3]
+        
+    #Returns a transform that moves by (x,y,z).
+    @classmethod
+    def translation(cls, movement=(0, 0, 0)):
+        matrix = numpy.identity(4)
+        matrix[:3, 3] = movement
+        return cls(matrix)
+        
+    #Returns a transform that scales by (x,y,z).
+    @classmethod
+    def scale(cls, resize=(1, 1, 1)):
+        return cls(numpy.diag([resize[0], resize[1], resize[2], 1.0]))
+        
+        
+#Mesh stored in numpy arrays.  co holds one (x,y,z) row per vertex.  Each polygon is looptotal vertex indices of loopverts starting at loopstart.
+class Mesh:
+    def __init__(self, co, looptotal, loopverts, loopstart=None):
+        self.co = numpy.asarray(co, dtype=numpy.float64).reshape(-1, 3)
+        self.looptotal = numpy.asarray(looptotal, dtype=numpy.int32).reshape(-1)
+        self.loopverts = numpy.asarray(loopverts, dtype=numpy.int32).reshape(-1)
+        if loopstart is None:
+            loopstart = numpy.cumsum(self.looptotal) - self.looptotal
+        self.loopstart = numpy.asarray(loopstart, dtype=numpy.int32).reshape(-1)
+        
+    #Returns a mesh made from a list of vertices and a list of faces, each face a list of vertex indices.
+    @classmethod
+    def fromPolygons(cls, co, faces):
+        return cls(co, [len(face) for face in faces], [vert for face in faces for vert in face])
+        
+    #Returns a mesh made from an (n, 3, 3) array of triangle corners.  Corners at the same point share one vertex.
+    @classmethod
+    def fromTriangles(cls, corners):
+        co, loopverts = uniqueRows(numpy.asarray(corners, dtype=numpy.float64).reshape(-1, 3))
+        return cls(co, numpy.full(len(loopverts) // 3, 3, dtype=numpy.int32), loopverts)
+        
+    #Returns a copy of the mesh moved by a transform.
+    def transformed(self, transform):
+        return Mesh(transform.apply(self.co), self.looptotal, self.loopverts, self.loopstart)
+        
+    #Returns the vertex index of every loop in polygon order.
+    def polygonLoops(self):
+        return polygonEdges(self.loopstart, self.looptotal, self.loopverts)[2]
+        
+    #Returns a hash of the mesh's polygons.  Meshes with the same polygons have the same hash, wherever their vertices are.
+    def topologyHash(self):
+        meshhash = hashlib.sha1()
+        for values in (self.looptotal, self.loopstart, self.loopverts):
+            meshhash.update(numpy.ascontiguousarray(values).tobytes())
+        return meshhash.hexdigest()
+        
+    #Returns a content hash of the mesh.  Meshes with the same vertices and polygons have the same hash.
+    def contentHash(self):
+        meshhash = hashlib.sha1()
+        for values in (self.co, self.looptotal, self.polygonLoops()):
+            meshhash.update(numpy.ascontiguousarray(values).tobytes())
+        return meshhash.hexdigest()
+        
+        
+#Returns one mesh holding the geometry of every mesh in a list.
+def mergeMeshes(meshes):
+    colist = []
+    totallist = []
+    looplist = []
+    vertcount = 0
+    for mesh in meshes:
+        colist.append(mesh.co)
+        totallist.append(mesh.looptotal)
+        looplist.append(mesh.polygonLoops() + vertcount)
+        vertcount = vertcount + len(mesh.co)
+    return Mesh(numpy.concatenate(colist), numpy.concatenate(totallist), numpy.concatenate(looplist))
+    
+    
+#Returns the unique rows of an (n, 3) array and the index of each original row in them.
+def uniqueRows(co):
+    order = numpy.lexsort((co[:, 2], co[:, 1], co[:, 0]))
+    newrow = numpy.concatenate(([True], numpy.any(co[order][1:] != co[order][:-1], axis=1)))
+    inverse = numpy.empty(len(co), dtype=numpy.int32)
+    inverse[order] = numpy.cumsum(newrow) - 1
+    return co[order][newrow], inverse
+    
+    
+#Returns a mesh read from a binary or ascii STL file.
+def loadSTL(filepath):
+    f = open(filepath, 'rb')
+    data = f.read()
+    f.close()
+    
+    #Binary files have an 80 byte header, a triangle count and 50 bytes per triangle.
+    if len(data) >= 84:
+        count = int(numpy.frombuffer(data[80:84], dtype='<u4')[0])
+        if len(data) == 84 + count * 50:
+            triangles = numpy.frombuffer(data[84:], dtype=numpy.dtype([('normal', '<f4', (3,)), ('corners', '<f4', (3, 3)), ('attribute', '<u2')]))
+            return Mesh.fromTriangles(triangles['corners'])
+            
+    corners = [line.split()[1:4] for line in data.decode('ascii', 'replace').splitlines() if line.strip().startswith('vertex')]
+    return Mesh.fromTriangles(numpy.array(corners, dtype=numpy.float64).reshape(-1, 3, 3))
+    
+    
+#Returns a mesh read from an OBJ file.  Only vertices and faces are read.
+def loadOBJ(filepath):
+    co = []
+    faces = []
+    f = open(filepath, 'r')
+    for line in f:
+        values = line.split()
+        if len(values) == 0:
+            continue
+        if values[0] == 'v':
+            co.append([float(value) for value in values[1:4]])
+        elif values[0] == 'f':
+            #Faces can be written as v, v/vt, v//vn or v/vt/vn.  Negative numbers count back from the last vertex.
+            face = [int(value.split('/')[0]) for value in values[1:]]
+            faces.append([index - 1 if index > 0 else len(co) + index for index in face])
+    f.close()
+    return Mesh.fromPolygons(co, faces)
+    
+    
+#=================================================
+#Geometry Functions
+
+#Function that checks if a line passes Z 0.
+def checkvalues(value1=None, value2=None):
+        if value1 <= 0 <= value2 or value2 <= 0 <= value1:
+            return True
+        else:
+            return False
+            
+            
+                    
+#Function that checks if a number is in range of another number
+def checkrange(value1, value2, valrange=.0001):
+    if value1 >= value2 - valrange and value1 <= value2 + valrange:
+        return True
+    else:
+        return False
+        
+        
+        
+#returns true if point matches
+def checkpoint(xval1, yval1, xval2, yval2):
+    if checkrange(xval1, xval2) == True and checkrange(yval1, yval2) == True:
+        return True
+    else:
+        return False
+        
+        
+
+
+
+#Kept for scripts that use it.  slicePolygons does not use it, vertices near the cut are snapped there instead of only vertices exactly on it.
+def z0xycoords(pointA,pointB):
+	""" Takes two three-dimensional coordinates (x,y,z) in list or tuple form.
+	Computes the x and y coordinates of the line at the z=0 plane.
+	Returns a list of length 2 with the x and y coords.
+	"""
+	if (pointA[2] == 0): #Point A is on the z=0 plane already
+		return pointA
+	elif (pointB[2] == 0 ): #Point B is on the z=0 plane already
+		return pointB
+	elif (pointA[2]*pointB[2] > 0 ): # Both points fall on the same side of the z=0 plane, so we cannot compute an answer
+		return False
+	else:
+		totaldiff = [(pointA[i]-pointB[i]) for i in range(3)] # The differences between the x,y, and z coordinates of the two points
+		xy = [ ( pointA[i] - totaldiff[i]*float(pointA[2])/totaldiff[2]) for i in range(2) ] # in each dimension, endpoint minus (difference times ratio of z)
+		return xy
+        
+        
+        
+#Returns the polygon index, first vertex and second vertex of every polygon edge.  Edges are in polygon order starting with the edge from the last vertex to the first.
+def polygonEdges(loopstart, looptotal, loopverts):
+    offsets = numpy.cumsum(looptotal) - looptotal
+    polyindex = numpy.repeat(numpy.arange(len(looptotal)), looptotal)
+    local = numpy.arange(looptotal.sum()) - numpy.repeat(offsets, looptotal)
+    start = numpy.repeat(loopstart, looptotal)
+    total = numpy.repeat(looptotal, looptotal)
+    return polyindex, loopverts[start + (local - 1) % total], loopverts[start + local]
+    
+    
+#Vertices closer than this to a cut are snapped onto it.
+SLICEEPS = .000001
+
+
+#Returns the distance of points above their cut heights, distances within SLICEEPS are snapped to 0.
+def cutDistance(zvalues, heights):
+    dist = zvalues - heights
+    dist[numpy.abs(dist) <= SLICEEPS] = 0
+    return dist
+    
+    
+#Pairs up the crossings of each polygon with a cut.  groups is the polygon of each crossing, in polygon order, and xy is the point of each crossing.
+#Polygons crossing twice make a pair from their first crossing to their second.  Polygons crossing more often, like concave ones, go in and out
+#of the cut in order along it.  Returns the polygon of each pair and the index of its first and second crossing, in polygon order.
+def crossingPairs(groups, xy):
+    if len(groups) == 0:
+        return groups, numpy.empty(0, dtype=numpy.intp), numpy.empty(0, dtype=numpy.intp)
+    first = numpy.flatnonzero(numpy.concatenate(([True], groups[1:] != groups[:-1])))
+    counts = numpy.diff(numpy.concatenate((first, [len(groups)])))
+    starts = first[counts == 2]
+    pairgroups = [groups[starts]]
+    pairfirst = [starts]
+    pairsecond = [starts + 1]
+    for start, count in zip(first[counts > 2].tolist(), counts[counts > 2].tolist()):
+        points = xy[start:start + count]
+        direction = points[numpy.argmax(numpy.hypot(*(points - points[0]).T))] - points[0]
+        order = start + numpy.argsort(points.dot(direction), kind='mergesort')
+        pairgroups.append(numpy.full(count // 2, groups[start]))
+        pairfirst.append(order[0::2])
+        pairsecond.append(order[1::2])
+        
+    pairgroups = numpy.concatenate(pairgroups)
+    order = numpy.argsort(pairgroups, kind='mergesort')
+    return pairgroups[order], numpy.concatenate(pairfirst)[order], numpy.concatenate(pairsecond)[order]
+    
+    
+#Cuts mesh polygons at Z heights.  polys and heights are matching arrays, a polygon can be listed once for each height it is cut at.
+#heights can also be one height for every polygon.  A vertex is above a cut if it is more than SLICEEPS above it, otherwise it is below,
+#so vertices, edges and faces on the cut are cut as if they were just below it and every polygon crosses the cut an even number of times.
+#Crossings of polygons that cross more than twice are paired in order along the cut.  Returns the index into polys of each line and an array
+#of lines x0,y0,x1,y1.
+def slicePolygons(mesh, polys, heights):
+    looptotal = mesh.looptotal[polys]
+    pairindex, verta, vertb = polygonEdges(mesh.loopstart[polys], looptotal, mesh.loopverts)
+    
+    #Each vertex is measured once, or once for each polygon and height it is cut at.
+    if numpy.ndim(heights) == 0:
+        vertdist = cutDistance(mesh.co[:, 2], heights)
+        dista = vertdist[verta]
+        distb = vertdist[vertb]
+    else:
+        distb = cutDistance(mesh.co[vertb, 2], numpy.asarray(heights)[pairindex])
+        offsets = numpy.cumsum(looptotal) - looptotal
+        previous = numpy.arange(len(distb)) - 1
+        previous[offsets] = offsets + looptotal - 1
+        dista = distb[previous]
+        
+    cross = (dista > 0) != (distb > 0)
+    pairindex = pairindex[cross]
+    if len(pairindex) == 0:
+        return pairindex, numpy.empty((0, 4))
+    pointa = mesh.co[verta[cross], :2]
+    pointb = mesh.co[vertb[cross], :2]
+    ratio = numpy.clip(dista[cross] / (dista[cross] - distb[cross]), 0, 1)[:, None]
+    xy = pointa - (pointa - pointb) * ratio
+    
+    lineindex, first, second = crossingPairs(pairindex, xy)
+    lines = numpy.hstack((xy[first], xy[second]))
+    
+    #Polygons that only touch the cut at a vertex make lines with no length.
+    keep = (lines[:, 0] != lines[:, 2]) | (lines[:, 1] != lines[:, 3])
+    return lineindex[keep], lines[keep]
+    
+    
+#Return cross section of a mesh through Z0, return each line as tuple x0,y0,x1,y1.
+def meshLineList(mesh):
+    polys = numpy.arange(len(mesh.looptotal))
+    pairindex, lines = slicePolygons(mesh, polys, 0.0)
+    return [tuple(line) for line in lines.tolist()]
+    
+    
+#Return cross sections of a mesh at each Z height, one line list per height.
+#Polygons are matched to the heights inside their Z extent with a sorted sweep, so each polygon is only cut where it has to be.
+def sliceLayers(mesh, zvalues):
+    zvalues = numpy.asarray(zvalues, dtype=numpy.float64).reshape(-1)
+    layerlist = [[] for zvalue in zvalues]
+    if len(zvalues) == 0 or len(mesh.looptotal) == 0:
+        return layerlist
+    order = numpy.argsort(zvalues, kind='mergesort')
+    zsorted = zvalues[order]
+    
+    #Z extent of each polygon gives the range of sorted heights it spans.
+    offsets = numpy.cumsum(mesh.looptotal) - mesh.looptotal
+    polyz = mesh.co[mesh.polygonLoops(), 2]
+    low = numpy.searchsorted(zsorted, numpy.minimum.reduceat(polyz, offsets) - SLICEEPS, 'left')
+    high = numpy.searchsorted(zsorted, numpy.maximum.reduceat(polyz, offsets), 'right')
+    
+    #One entry for each polygon and height it spans, grouped by height.
+    counts = high - low
+    polys = numpy.repeat(numpy.arange(len(mesh.looptotal)), counts)
+    layers = numpy.repeat(low, counts) + numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+    bylayer = numpy.argsort(layers, kind='mergesort')
+    polys = polys[bylayer]
+    layers = layers[bylayer]
+    
+    pairindex, lines = slicePolygons(mesh, polys, zsorted[layers])
+    lines = lines.tolist()
+    bounds = numpy.searchsorted(layers[pairindex], numpy.arange(len(zsorted) + 1), 'left')
+    for i in range(len(zsorted)):
+        layerlist[order[i]] = [tuple(line) for line in lines[bounds[i]:bounds[i + 1]]]
+    return layerlist
+    
+    
+#=================================================
+#Edge Index.  Polygons that share an edge are found from an index of the mesh's edges, so cross sections can be followed from polygon to
+#polygon instead of matching line end points.  Indexes are kept by topology hash, so they are reused until the polygons change.
+
+#Most bytes of edge indexes kept.  Least recently used indexes are dropped when there are more, an index bigger than this is not kept.
+edgeindexcachebytes = 64 * 1024 * 1024
+
+#Edge indexes by topology hash, least recently used first.
+edgeindexcache = collections.OrderedDict()
+
+
+#Returns the bytes used by an edge index.
+def edgeIndexBytes(edgeindex):
+    return sum(values.nbytes for values in edgeindex.values())
+
+
+#Returns the edge index of a mesh.  "edges" holds the two vertices of each edge, "loopedge" the edge of each polygon edge from polygonEdges
+#and "polyindex" its polygon.  Indexes are stored as int32 to keep the cache small.
+def meshEdgeIndex(mesh):
+    key = mesh.topologyHash()
+    if key in edgeindexcache:
+        edgeindexcache.move_to_end(key)
+        return edgeindexcache[key]
+        
+    polyindex, verta, vertb = polygonEdges(mesh.loopstart, mesh.looptotal, mesh.loopverts)
+    low = numpy.minimum(verta, vertb).astype(numpy.int64)
+    high = numpy.maximum(verta, vertb).astype(numpy.int64)
+    keys, loopedge = numpy.unique(low * (len(mesh.co) + 1) + high, return_inverse=True)
+    edges = numpy.column_stack((keys // (len(mesh.co) + 1), keys % (len(mesh.co) + 1)))
+    edgeindex = {"edges": edges.astype(numpy.int32), "loopedge": loopedge.reshape(-1).astype(numpy.int32),
+                 "polyindex": polyindex.astype(numpy.int32)}
+    
+    if edgeIndexBytes(edgeindex) <= edgeindexcachebytes:
+        edgeindexcache[key] = edgeindex
+        cachebytes = sum(edgeIndexBytes(cached) for cached in edgeindexcache.values())
+        while cachebytes > edgeindexcachebytes:
+            cachebytes = cachebytes - edgeIndexBytes(edgeindexcache.popitem(last=False)[1])
+    return edgeindex
+    
+    
+#Removes every saved edge index.
+def edgeIndexClear():
+    edgeindexcache.clear()
+    
+    
+#Returns the cross section of a mesh at a Z height as a SegmentBuffer of line sets, like chainLines.  Each crossed edge is cut once and the lines are followed from
+#polygon to polygon through the edges they share.  Uses the same rules as slicePolygons.
+def meshContours(mesh, height=0.0):
+    if len(mesh.looptotal) == 0:
+        return SegmentBuffer()
+    edgeindex = meshEdgeIndex(mesh)
+    edges = edgeindex["edges"]
+    dist = cutDistance(mesh.co[:, 2], height)
+    above = dist > 0
+    
+    #Each crossed edge is one node of the contours, cut once.
+    crossed = above[edges[:, 0]] != above[edges[:, 1]]
+    verta = edges[crossed, 0]
+    vertb = edges[crossed, 1]
+    ratio = numpy.clip(dist[verta] / (dist[verta] - dist[vertb]), 0, 1)[:, None]
+    points = mesh.co[verta, :2] - (mesh.co[verta, :2] - mesh.co[vertb, :2]) * ratio
+    node = numpy.full(len(edges), -1)
+    node[crossed] = numpy.arange(len(verta))
+    
+    #Each polygon joins the nodes of its crossings in pairs.
+    loopnodes = node[edgeindex["loopedge"]]
+    hit = loopnodes >= 0
+    loopnodes = loopnodes[hit]
+    pairs, first, second = crossingPairs(edgeindex["polyindex"][hit], points[loopnodes])
+    return walkContours(loopnodes[first], loopnodes[second], points)
+    
+    
+#Follows segments between nodes into a SegmentBuffer of line sets.  Open line sets are walked from one end so each comes out whole, then the closed
+#ones are walked.  Segments with no length are followed but not written.
+def walkContours(nodea, nodeb, points):
+    count = len(nodea)
+    ends = numpy.concatenate((nodea, nodeb))
+    order = numpy.argsort(ends, kind='mergesort')
+    bounds = numpy.searchsorted(ends[order], numpy.arange(len(points) + 1)).tolist()
+    nodesegments = (order % max(count, 1)).tolist()
+    degree = numpy.diff(bounds)
+    nodea = nodea.tolist()
+    nodeb = nodeb.tolist()
+    
+    used = [False] * count
+    paths = []
+    for startnode in numpy.flatnonzero(degree == 1).tolist() + nodea:
+        path = [startnode]
+        while True:
+            node = path[-1]
+            segment = None
+            for candidate in nodesegments[bounds[node]:bounds[node + 1]]:
+                if used[candidate] != True:
+                    segment = candidate
+                    break
+            if segment == None:
+                break
+            used[segment] = True
+            path.append(nodeb[segment] if nodea[segment] == node else nodea[segment])
+            
+        if len(path) > 1:
+            paths.append(path)
+    if len(paths) == 0:
+        return SegmentBuffer()
+        
+    #Lines join each node of a path to the next one.
+    nodes = numpy.concatenate(paths)
+    pathends = numpy.cumsum([len(path) for path in paths])
+    inpath = numpy.ones(len(nodes) - 1, dtype=bool)
+    inpath[pathends[:-1] - 1] = False
+    lines = numpy.hstack((points[nodes[:-1][inpath]], points[nodes[1:][inpath]]))
+    pathindex = numpy.repeat(numpy.arange(len(paths)), [len(path) - 1 for path in paths])
+    keep = numpy.any(lines[:, :2] != lines[:, 2:], axis=1)
+    counts = numpy.bincount(pathindex[keep], minlength=len(paths))
+    return SegmentBuffer(lines[keep], numpy.concatenate(([0], numpy.cumsum(counts[counts > 0]))))
+    
+    
+#Returns min, max and mid points of an array of points.
+def pointBounds(co):
+    minpoint = co.min(axis=0)
+    maxpoint = co.max(axis=0)
+    return (tuple(minpoint.tolist()), tuple(maxpoint.tolist()), tuple(((minpoint + maxpoint) / 2).tolist()))
+    
+    
+#Returns a unit primitive mesh centered on the origin and its loose edges, the same shapes the blender primitive operators make with radius .5 and depth 1.
+#key is (type, vertices, r1, r2).  Circles have no faces, only edges.  Rings start at +Y and go counter clockwise like blender's.
+def primitiveGeometry(key):
+    ptype, vertices, r1, r2 = key
+    faces = []
+    edges = []
+    if ptype == 'PLANE':
+        co = [(-.5, -.5, 0), (.5, -.5, 0), (.5, .5, 0), (-.5, .5, 0)]
+        faces = [(0, 1, 2, 3)]
+        
+    elif ptype == 'CUBE':
+        co = [(x, y, z) for z in (-.5, .5) for y in (-.5, .5) for x in (-.5, .5)]
+        faces = [(0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4), (1, 3, 7, 5), (3, 2, 6, 7), (2, 0, 4, 6)]
+        
+    elif ptype == 'CIRCLE':
+        co = [(-.5 * math.sin(2 * math.pi * i / vertices), .5 * math.cos(2 * math.pi * i / vertices), 0) for i in range(vertices)]
+        edges = [(i - 1 if i > 0 else vertices - 1, i) for i in range(vertices)]
+        
+    elif ptype == 'CONE':
+        #A ring for each end, or a single tip vertex if the radius is 0.
+        rings = []
+        co = []
+        for radius, z in ((r1, -.5), (r2, .5)):
+            if radius == 0:
+                rings.append([len(co)] * vertices)
+                co.append((0, 0, z))
+            else:
+                rings.append(list(range(len(co), len(co) + vertices)))
+                co.extend((-radius * math.sin(2 * math.pi * i / vertices), radius * math.cos(2 * math.pi * i / vertices), z) for i in range(vertices))
+        for i in range(vertices):
+            face = (rings[0][i - 1], rings[0][i], rings[1][i], rings[1][i - 1])
+            faces.append(tuple(vert for index, vert in enumerate(face) if vert != face[index - 1]))
+        if r1 != 0:
+            faces.append(tuple(reversed(rings[0])))
+        if r2 != 0:
+            faces.append(tuple(rings[1]))
+                
+    elif ptype == 'SPHEREUV':
+        #32 segments and 16 rings with a vertex at each pole.
+        segments, ringcount = 32, 16
+        co = [(0, 0, -.5)]
+        for ring in range(1, ringcount):
+            angle = math.pi * ring / ringcount - math.pi / 2
+            co.extend((-.5 * math.cos(angle) * math.sin(2 * math.pi * i / segments), .5 * math.cos(angle) * math.cos(2 * math.pi * i / segments), .5 * math.sin(angle)) for i in range(segments))
+        co.append((0, 0, .5))
+        for i in range(segments):
+            faces.append((0, 1 + (i + 1) % segments, 1 + i))
+            faces.append((len(co) - 1, 1 + (ringcount - 2) * segments + i, 1 + (ringcount - 2) * segments + (i + 1) % segments))
+            for ring in range(ringcount - 2):
+                faces.append((1 + ring * segments + i, 1 + ring * segments + (i + 1) % segments, 1 + (ring + 1) * segments + (i + 1) % segments, 1 + (ring + 1) * segments + i))
+                
+    elif ptype == 'SPHEREICO':
+        #Blender's icosahedron with a vertex at each pole, radius 200 scaled to .5.  Split once like subdivisions=2, the new vertices are
+        #moved out onto the sphere.
+        co = [(0, 0, -200), (144.72, -105.144, -89.443), (-55.277, -170.128, -89.443), (-178.885, 0, -89.443), (-55.277, 170.128, -89.443),
+              (144.72, 105.144, -89.443), (55.277, -170.128, 89.443), (-144.72, -105.144, 89.443), (-144.72, 105.144, 89.443),
+              (55.277, 170.128, 89.443), (178.885, 0, 89.443), (0, 0, 200)]
+        co = [tuple(value / 400 for value in vert) for vert in co]
+        faces = [(0, 1, 2), (1, 0, 5), (0, 2, 3), (0, 3, 4), (0, 4, 5), (1, 5, 10), (2, 1, 6), (3, 2, 7), (4, 3, 8), (5, 4, 9),
+                 (1, 10, 6), (2, 6, 7), (3, 7, 8), (4, 8, 9), (5, 9, 10), (6, 10, 11), (7, 6, 11), (8, 7, 11), (9, 8, 11), (10, 9, 11)]
+        midpoints = {}
+        def midpoint(a, b):
+            if (b, a) in midpoints:
+                return midpoints[(b, a)]
+            mid = [(co[a][i] + co[b][i]) / 2 for i in range(3)]
+            length = math.sqrt(sum(value * value for value in mid))
+            co.append(tuple(.5 * value / length for value in mid))
+            midpoints[(a, b)] = len(co) - 1
+            return len(co) - 1
+        split = []
+        for a, b, c in faces:
+            ab, bc, ca = midpoint(a, b), midpoint(b, c), midpoint(c, a)
+            split.extend([(a, ab, ca), (b, bc, ab), (c, ca, bc), (ab, bc, ca)])
+        faces = split
+        
+    return Mesh.fromPolygons(co, faces), edges
+    
+    
+#=================================================
+#Toolpath Functions
+
+#Returns the spatial hash grid cell of a point.  Cells are valrange wide so matching points are always in neighbouring cells.
+#A valrange of 0 only matches equal points, so the cell is the point itself.
+def gridcell(xval, yval, valrange=.0001):
+    if valrange <= 0:
+        return (xval, yval)
+    return (int(math.floor(xval / valrange)), int(math.floor(yval / valrange)))
+
+
+#Buckets both endpoints of every line into a spatial hash grid.  Each entry is (line index, endpoint 0 or 1).
+def linegrid(linelist, valrange=.0001):
+    grid = {}
+    for index, line in enumerate(linelist):
+        grid.setdefault(gridcell(line[0], line[1], valrange), []).append((index, 0))
+        grid.setdefault(gridcell(line[2], line[3], valrange), []).append((index, 1))
+    return grid
+
+
+#Finds the unused line with the endpoint nearest to a point, within valrange.  Equally near endpoints go to the first line.
+#Returns (line index, endpoint) or None.
+def gridmatch(grid, used, linelist, xval, yval, valrange=.0001):
+    cellx, celly = gridcell(xval, yval, valrange)
+    if valrange <= 0:
+        cells = [(cellx, celly)]
+    else:
+        cells = [(cellx + i, celly + j) for i in (-1, 0, 1) for j in (-1, 0, 1)]
+    found = None
+    for cell in cells:
+        entries = grid.get(cell)
+        if entries == None:
+            continue
+        #Drop lines that were already placed so busy cells do not get rescanned.
+        if any(used[index] for index, end in entries):
+            entries[:] = [(index, end) for index, end in entries if used[index] == False]
+        for index, end in entries:
+            line = linelist[index]
+            if checkrange(xval, line[end * 2], valrange) == True and checkrange(yval, line[end * 2 + 1], valrange) == True:
+                distance = (xval - line[end * 2]) ** 2 + (yval - line[end * 2 + 1]) ** 2
+                if found == None or distance < best or (distance == best and (index, end) < found):
+                    found = (index, end)
+                    best = distance
+    return found
+
+
+#Yields each line set of a line list in toolpath order.  A line set is a list of lines where each line starts at the end of the last one.
+def chainLines(linelist, valrange=.0001):
+    used = [False] * len(linelist)
+    grid = linegrid(linelist, valrange)
+    nextstart = 0
+    placed = 0
+    while placed < len(linelist):
+        #Start a new line set with the first line that has not been placed yet.
+        while used[nextstart] == True:
+            nextstart = nextstart + 1
+        lineset = [linelist[nextstart]]
+        used[nextstart] = True
+        placed = placed + 1
+        
+        #Follow the line set until no line continues from its end point.
+        match = gridmatch(grid, used, linelist, lineset[-1][2], lineset[-1][3], valrange)
+        while match != None:
+            line = linelist[match[0]]
+            if match[1] == 0:
+                lineset.append((line[0], line[1], line[2], line[3]))
+            else:
+                lineset.append((line[2], line[3], line[0], line[1]))
+            used[match[0]] = True
+            placed = placed + 1
+            match = gridmatch(grid, used, linelist, lineset[-1][2], lineset[-1][3], valrange)
+        yield lineset
+        
+        
+#Sorts line list into toolpath order with section breaks.  progress is called with the number of lines left to place.
+#A SegmentBuffer can be given instead of a line list, then its lines are sorted into a new SegmentBuffer.
+def SortLineList(linelist, valrange=.0001, progress=None):
+    if isinstance(linelist, SegmentBuffer):
+        return SegmentBuffer.fromLineSets(chainLines(linelist.lines.tolist(), valrange))
+    finallinelist = []
+    for lineset in chainLines(linelist, valrange):
+        if progress != None:
+            progress(len(linelist) - len(finallinelist))
+        finallinelist.append("NewLineSet")
+        finallinelist.extend(lineset)
+    return finallinelist
+    
+    
+#Returns True if every point in a list is within tolerance of the line from pointa to pointb and between its ends.
+def pointsOnLine(points, pointa, pointb, tolerance=.0001):
+    dx = pointb[0] - pointa[0]
+    dy = pointb[1] - pointa[1]
+    length = math.sqrt(dx * dx + dy * dy)
+    if length <= tolerance:
+        return False
+    for point in points:
+        along = ((point[0] - pointa[0]) * dx + (point[1] - pointa[1]) * dy) / length
+        across = ((point[1] - pointa[1]) * dx - (point[0] - pointa[0]) * dy) / length
+        if along < 0 or along > length or abs(across) > tolerance:
+            return False
+    return True
+    
+    
+#Returns a list of points with the points in the middle of straight runs left out.  A run ends when any point left out of it would be more than
+#tolerance away from the straight line, so long gentle curves are kept.
+#Each run keeps the range of directions from its first point that pass within tolerance of every point in it, and the farthest point's distance,
+#so each point is only checked once.
+def mergeCollinear(points, tolerance=.0001):
+    if len(points) < 3:
+        return list(points)
+    kept = [points[0]]
+    last = None
+    for point in points[1:]:
+        dx = point[0] - kept[-1][0]
+        dy = point[1] - kept[-1][1]
+        length = math.sqrt(dx * dx + dy * dy)
+        if last != None:
+            if length <= tolerance or length < farthest:
+                inrange = False
+            elif reference == None:
+                inrange = True
+            else:
+                angle = (math.atan2(dy, dx) - reference + math.pi) % (2 * math.pi) - math.pi
+                inrange = low <= angle <= high
+            if inrange != True:
+                kept.append(last)
+                dx = point[0] - last[0]
+                dy = point[1] - last[1]
+                length = math.sqrt(dx * dx + dy * dy)
+                last = None
+                
+        #Start a run, or narrow its directions to the ones passing within tolerance of this point.
+        if last == None:
+            reference = None
+            low = -math.pi
+            high = math.pi
+            farthest = 0
+        if length > 0:
+            if reference == None:
+                reference = math.atan2(dy, dx)
+            center = (math.atan2(dy, dx) - reference + math.pi) % (2 * math.pi) - math.pi
+            width = math.asin(min(tolerance / length, 1))
+            low = max(low, center - width)
+            high = min(high, center + width)
+            farthest = max(farthest, length)
+        last = point
+    kept.append(last)
+    return kept
+    
+    
+#Returns a line set as a polyline (points, closed) with straight runs merged.  The line set is closed if it ends within tolerance of its start,
+#then the first point is not repeated at the end.
+def lineSetPolyline(lineset, tolerance=.0001):
+    points = [(lineset[0][0], lineset[0][1])] + [(line[2], line[3]) for line in lineset]
+    closed = (len(points) > 3 and abs(points[0][0] - points[-1][0]) <= tolerance and abs(points[0][1] - points[-1][1]) <= tolerance)
+    points = mergeCollinear(points, tolerance)
+    if closed != True:
+        return points, False
+        
+    #The first point of a closed polyline can be in the middle of a straight run too.
+    points = points[:-1]
+    if len(points) > 3 and pointsOnLine([points[0]], points[-1], points[1], tolerance) == True:
+        points = points[1:]
+    return points, True
+    
+    
+#Yields each line set of a line list as a polyline (points, closed).  Line sets are chained with tolerance as the gap between lines.
+def chainPolylines(linelist, tolerance=.0001):
+    for lineset in chainLines(linelist, tolerance):
+        yield lineSetPolyline(lineset, tolerance)
+        
+        
+#=================================================
+#Segment Buffer.  Line sets stored in one float64 array of lines x0,y0,x1,y1 and an array of where each line set starts.
+
+#First bytes of a saved SegmentBuffer.
+SEGMENTMAGIC = b'OBTSEG01'
+
+
+#Line sets in arrays.  lines is an (n, 4) float64 array, the lines of line set i are lines[offsets[i]:offsets[i + 1]].
+#Iterating gives each line set as a list of lines like chainLines, contour(i) gives a line set as a numpy view without copying it.
+#buffer = bt.SegmentBuffer.fromLineList(bt.SortLineList(linelist))
+class SegmentBuffer:
+    def __init__(self, lines=None, offsets=None):
+        if lines is None:
+            lines = numpy.empty((0, 4))
+        self.lines = numpy.ascontiguousarray(lines, dtype=numpy.float64).reshape(-1, 4)
+        if offsets is None:
+            offsets = [0, len(self.lines)] if len(self.lines) > 0 else [0]
+        self.offsets = numpy.ascontiguousarray(offsets, dtype=numpy.int64).reshape(-1)
+        
+    #Returns a buffer made from line sets, each a list of lines.
+    @classmethod
+    def fromLineSets(cls, linesets):
+        lines = []
+        offsets = [0]
+        for lineset in linesets:
+            if len(lineset) > 0:
+                lines.extend(lineset)
+                offsets.append(len(lines))
+        return cls(lines, offsets)
+        
+    #Returns a buffer made from SortLineList output.  Each NewLineSet starts a line set, a list without NewLineSet is one line set.
+    @classmethod
+    def fromLineList(cls, linelist):
+        if isinstance(linelist, SegmentBuffer):
+            return linelist
+        lines = []
+        offsets = [0]
+        for line in linelist:
+            if line == "NewLineSet":
+                if len(lines) > offsets[-1]:
+                    offsets.append(len(lines))
+            else:
+                lines.append(line)
+        if len(lines) > offsets[-1]:
+            offsets.append(len(lines))
+        return cls(lines, offsets)
+        
+    #Returns one buffer holding the line sets of every buffer in a list.
+    @classmethod
+    def concatenate(cls, buffers):
+        buffers = list(buffers)
+        if len(buffers) == 0:
+            return cls()
+        offsets = [numpy.zeros(1, dtype=numpy.int64)]
+        count = 0
+        for segments in buffers:
+            offsets.append(segments.offsets[1:] + count)
+            count = count + len(segments.lines)
+        return cls(numpy.vstack([segments.lines for segments in buffers]), numpy.concatenate(offsets))
+        
+    #Returns a buffer read from toBytes data or a saved file.  The arrays are views of data, so nothing is copied.
+    @classmethod
+    def fromBytes(cls, data):
+        if bytes(data[:8]) != SEGMENTMAGIC:
+            raise ValueError("data is not a saved SegmentBuffer")
+        counts = numpy.frombuffer(data, dtype=numpy.int64, count=2, offset=8)
+        lines = numpy.frombuffer(data, dtype=numpy.float64, count=int(counts[1]) * 4, offset=24)
+        offsets = numpy.frombuffer(data, dtype=numpy.int64, count=int(counts[0]), offset=24 + 32 * int(counts[1]))
+        segments = cls.__new__(cls)
+        segments.offsets = offsets
+        segments.lines = lines.reshape(-1, 4)
+        return segments
+        
+    #Returns a buffer read from a file written by save or SegmentWriter.  With mmap=True the file is memory mapped instead of read,
+    #so line sets are only loaded from disk as they are used.
+    @classmethod
+    def load(cls, filepath, mmap=False):
+        if mmap == True:
+            return cls.fromBytes(numpy.memmap(filepath, dtype=numpy.uint8, mode='r'))
+        f = open(filepath, 'rb')
+        data = f.read()
+        f.close()
+        return cls.fromBytes(data)
+        
+    #Returns the buffer as bytes: SEGMENTMAGIC, the offset and line counts, the lines and the offsets.
+    def toBytes(self):
+        return (SEGMENTMAGIC + numpy.array([len(self.offsets), len(self.lines)], dtype=numpy.int64).tobytes() +
+                self.lines.tobytes() + self.offsets.tobytes())
+                
+    #Writes the buffer to a file in the toBytes layout.
+    def save(self, filepath):
+        with SegmentWriter(filepath) as writer:
+            writer.addLineSets(self)
+            
+
+    #Returns SortLineList output, each line set starts with NewLineSet.
+    def toLineList(self):
+        linelist = []
+        for lineset in self:
+            linelist.append("NewLineSet")
+            linelist.extend(tuple(line) for line in lineset)
+        return linelist
+        
+    #Returns a line set as an (n, 4) numpy view of lines.  memoryview(buffer.contour(i)) also works without copying.
+    def contour(self, index):
+        return self.lines[self.offsets[index]:self.offsets[index + 1]]
+        
+    #Returns the number of line sets.
+    def contourCount(self):
+        return len(self.offsets) - 1
+        
+    #Returns a boolean array, True for each line set that ends within valrange of its start, the same test as lineSetClosed.
+    def closedMask(self, valrange=.0001):
+        counts = numpy.diff(self.offsets)
+        if len(self.lines) == 0:
+            return counts > 2
+        first = self.lines[numpy.minimum(self.offsets[:-1], len(self.lines) - 1)]
+        last = self.lines[numpy.maximum(self.offsets[1:] - 1, 0)]
+        return (counts > 2) & numpy.all(numpy.abs(first[:, :2] - last[:, 2:]) <= valrange, axis=1)
+        
+    #Returns a new buffer with the line sets where mask is True.
+    def select(self, mask):
+        counts = numpy.diff(self.offsets)[mask]
+        keep = numpy.repeat(numpy.asarray(mask), numpy.diff(self.offsets))
+        return SegmentBuffer(self.lines[keep], numpy.concatenate(([0], numpy.cumsum(counts))))
+        
+    #Yields each line set as a list of [x0, y0, x1, y1] lines.
+    def __iter__(self):
+        offsets = self.offsets.tolist()
+        for index in range(len(offsets) - 1):
+            yield self.lines[offsets[index]:offsets[index + 1]].tolist()
+            
+    #Returns the number of lines.
+    def __len__(self):
+        return len(self.lines)
+        
+        
+#Writes line sets to a SegmentBuffer file as they are made, only the line set offsets are kept in memory.
+#The file is written next to filepath and renamed to it on close, so a file at filepath is always complete.
+#with bt.SegmentWriter("/path/slice.seg") as writer: writer.addLineSet(lineset)
+class SegmentWriter:
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.temppath = filepath + "." + str(os.getpid()) + ".tmp"
+        self.offsets = [0]
+        self.f = None
+        
+    #Open the file and write a header, the counts are filled in on close.
+    def open(self):
+        self.f = open(self.temppath, 'wb')
+        self.f.write(SEGMENTMAGIC + numpy.zeros(2, dtype=numpy.int64).tobytes())
+        return self
+        
+    #Write one line set, a list or (n, 4) array of lines.
+    def addLineSet(self, lineset):
+        lines = numpy.ascontiguousarray(lineset, dtype=numpy.float64).reshape(-1, 4)
+        if len(lines) > 0:
+            self.f.write(lines.tobytes())
+            self.offsets.append(self.offsets[-1] + len(lines))
+            
+    #Write each line set from a list of line sets or a SegmentBuffer.
+    def addLineSets(self, linesets):
+        if isinstance(linesets, SegmentBuffer):
+            self.f.write(linesets.lines.tobytes())
+            self.offsets.extend((linesets.offsets[1:] + self.offsets[-1]).tolist())
+            return
+        for lineset in linesets:
+            self.addLineSet(lineset)
+            
+    #Write the offsets and counts, close the file and move it to filepath.
+    def close(self):
+        self.f.write(numpy.array(self.offsets, dtype=numpy.int64).tobytes())
+        self.f.seek(len(SEGMENTMAGIC))
+        self.f.write(numpy.array([len(self.offsets), self.offsets[-1]], dtype=numpy.int64).tobytes())
+        self.f.close()
+        self.f = None
+        os.replace(self.temppath, self.filepath)
+        
+    def __enter__(self):
+        return self.open()
+        
+    #A failed write leaves no file behind.
+    def __exit__(self, exctype, excvalue, traceback):
+        if exctype != None:
+            self.f.close()
+            self.f = None
+            os.remove(self.temppath)
+        else:
+            self.close()
+            
+            
+#=================================================
+#Travel Optimizer.  Orders line sets so the tool travels less between them.  A closed line set can start at any of its lines, an open one at either end.
+
+#Returns True if a line set ends within valrange of its start.
+def lineSetClosed(lineset, valrange=.0001):
+    return len(lineset) > 2 and checkrange(lineset[0][0], lineset[-1][2], valrange) == True and checkrange(lineset[0][1], lineset[-1][3], valrange) == True
+    
+    
+#Returns a line set turned around, so it starts at the end of its last line.
+def lineSetReversed(lineset):
+    return [(line[2], line[3], line[0], line[1]) for line in reversed(lineset)]
+    
+    
+#Returns the length of the tool up moves to each line set in order, starting from start.
+def travelDistance(linesets, start=(0, 0)):
+    distance = 0.0
+    xval, yval = start
+    for lineset in linesets:
+        distance = distance + math.hypot(lineset[0][0] - xval, lineset[0][1] - yval)
+        xval, yval = lineset[-1][2], lineset[-1][3]
+    return distance
+    
+    
+#Finds the entry point nearest to a point in a spatial hash grid of entry points.  Returns the entry index or None if the grid is empty.
+#Rings of cells around the point are searched until no closer point can be in the next ring.  Once a ring has more cells than the grid
+#every remaining cell is searched.
+def gridnearest(grid, points, xval, yval, cellsize):
+    cellx, celly = gridcell(xval, yval, cellsize)
+    found = None
+    best = float('inf')
+    ring = 0
+    while len(grid) > 0:
+        if (2 * ring + 1) ** 2 > len(grid):
+            cells = list(grid.keys())
+        else:
+            cells = [(cellx + i, celly + j) for i in range(-ring, ring + 1) for j in range(-ring, ring + 1) if max(abs(i), abs(j)) == ring]
+        for cell in cells:
+            for index in grid.get(cell, ()):
+                distance = math.hypot(points[index][0] - xval, points[index][1] - yval)
+                if distance < best or (distance == best and index < found):
+                    found = index
+                    best = distance
+        if (2 * ring + 1) ** 2 > len(grid) or best <= ring * cellsize:
+            return found
+        ring = ring + 1
+    return found
+    
+    
+#Orders line sets by always moving to the nearest entry point of a line set that has not been cut yet.
+def nearestOrder(linesets, start=(0, 0), valrange=.0001):
+    points = []
+    entries = []
+    for setindex, lineset in enumerate(linesets):
+        if lineSetClosed(lineset, valrange) == True:
+            for lineindex, line in enumerate(lineset):
+                points.append((line[0], line[1]))
+                entries.append((setindex, lineindex, False))
+        else:
+            points.append((lineset[0][0], lineset[0][1]))
+            entries.append((setindex, 0, False))
+            points.append((lineset[-1][2], lineset[-1][3]))
+            entries.append((setindex, 0, True))
+    if len(points) == 0:
+        return []
+        
+    #Cells are sized so there is about one entry point per cell.
+    pointarray = numpy.asarray(points)
+    extent = max(float(numpy.max(pointarray.max(axis=0) - pointarray.min(axis=0))), valrange)
+    cellsize = max(extent / math.sqrt(len(points)), valrange)
+    if cellsize <= 0:
+        cellsize = 1.0
+    grid = {}
+    setentries = [[] for lineset in linesets]
+    for index, point in enumerate(points):
+        cell = gridcell(point[0], point[1], cellsize)
+        grid.setdefault(cell, set()).add(index)
+        setentries[entries[index][0]].append((cell, index))
+        
+    ordered = []
+    xval, yval = start
+    for count in range(len(linesets)):
+        setindex, lineindex, reverse = entries[gridnearest(grid, points, xval, yval, cellsize)]
+        for cell, index in setentries[setindex]:
+            grid[cell].discard(index)
+            if len(grid[cell]) == 0:
+                del grid[cell]
+        lineset = linesets[setindex]
+        if reverse == True:
+            lineset = lineSetReversed(lineset)
+        elif lineindex > 0:
+            lineset = lineset[lineindex:] + lineset[:lineindex]
+        ordered.append(lineset)
+        xval, yval = lineset[-1][2], lineset[-1][3]
+    return ordered
+    
+    
+#Improves the order of line sets with 2-opt moves until no move helps or timelimit seconds have passed.  A move cuts a run of line sets in
+#reverse order, open line sets in the run are turned around.  Closed line sets end where they start, so they keep their direction.
+def twoOptOrder(linesets, start=(0, 0), timelimit=1.0, valrange=.0001):
+    linesets = list(linesets)
+    count = len(linesets)
+    if count < 2:
+        return linesets
+    closed = [lineSetClosed(lineset, valrange) for lineset in linesets]
+    entry = numpy.array([(lineset[0][0], lineset[0][1]) for lineset in linesets], dtype=numpy.float64)
+    exit = numpy.array([(lineset[-1][2], lineset[-1][3]) for lineset in linesets], dtype=numpy.float64)
+    startpoint = numpy.asarray(start, dtype=numpy.float64)
+    
+    deadline = time.perf_counter() + timelimit
+    improved = True
+    while improved == True and time.perf_counter() < deadline:
+        improved = False
+        for i in range(count):
+            #Change of travel for reversing the run i..j, for every j at once.
+            before = startpoint if i == 0 else exit[i - 1]
+            change = numpy.hypot(*(exit[i:] - before).T) - math.hypot(*(entry[i] - before))
+            change[:-1] = change[:-1] + numpy.hypot(*(entry[i + 1:] - entry[i]).T) - numpy.hypot(*(entry[i + 1:] - exit[i:-1]).T)
+            j = i + int(numpy.argmin(change))
+            if change[j - i] < -valrange:
+                linesets[i:j + 1] = [lineset if closed[i + j - index] == True else lineSetReversed(lineset)
+                                     for index, lineset in zip(range(i, j + 1), reversed(linesets[i:j + 1]))]
+                closed[i:j + 1] = closed[i:j + 1][::-1]
+                entry[i:j + 1], exit[i:j + 1] = exit[i:j + 1][::-1].copy(), entry[i:j + 1][::-1].copy()
+                improved = True
+            if time.perf_counter() >= deadline:
+                break
+    return linesets
+    
+    
+#Orders line sets to cut down tool travel.  Line sets are first ordered nearest neighbour first, then improved by 2-opt for up to timelimit seconds.
+#Returns (line sets, travel before, travel after).  The line sets are left in their order if that travels less.
+def optimizeTravel(linesets, start=(0, 0), timelimit=1.0, valrange=.0001):
+    linesets = list(linesets)
+    before = travelDistance(linesets, start)
+    ordered = twoOptOrder(nearestOrder(linesets, start, valrange), start, timelimit, valrange)
+    after = travelDistance(ordered, start)
+    if after > before:
+        return linesets, before, before
+    return ordered, before, after
+    
+    
+#=================================================
+#Mesh Export
+
+#Calls funct on each item and yields the results in order, like map.
+#With processes other than 1 the calls run in a process pool, None uses one process per core.  funct and the items must be picklable.
+#Workers are always started with fork.  Inside blender sys.executable is blender itself, so spawned workers could not start.
+#Where fork is not available, like Windows, the calls run in this process.
+def poolMap(funct, items, processes=1):
+    if processes != None and (isinstance(processes, int) != True or processes < 1):
+        raise ValueError("processes must be None or a number greater than 0, not " + str(processes))
+        
+    if processes == 1 or "fork" not in multiprocessing.get_all_start_methods():
+        for item in items:
+            yield funct(item)
+        return
+        
+    pool = multiprocessing.get_context("fork").Pool(processes)
+    finished = False
+    try:
+        for result in pool.imap(funct, items):
+            yield result
+        finished = True
+    finally:
+        if finished == True:
+            pool.close()
+        else:
+            pool.terminate()
+        pool.join()
+        
+        
+#Returns the line sets of a mesh's Z0 cross section in toolpath order.  Contours are followed through the mesh's edges with meshContours,
+#only the lines of open contours, like ones at holes in the mesh, are joined by matching end points within valrange.  Returns a SegmentBuffer,
+#a SegmentBuffer given instead of a mesh is returned as it is.
+def meshLineSets(mesh, valrange=.0001, height=0.0):
+    if isinstance(mesh, SegmentBuffer):
+        return mesh
+    contours = meshContours(mesh, height)
+    closed = contours.closedMask(valrange)
+    if numpy.all(closed):
+        return contours
+    openlines = contours.select(~closed).lines.tolist()
+    return SegmentBuffer.concatenate([contours.select(closed), SegmentBuffer.fromLineSets(chainLines(openlines, valrange))])
+    
+    
+#Yields the line sets of each mesh in order.  With processes other than 1 the meshes are sliced and chained in a process pool.
+#meshes can also hold SegmentBuffers, their line sets are used as they are.
+#With a cachedir the line sets are saved there by sliceCacheFile and read back through a memory map, meshes already in the cache are not sliced.
+def lineSetStream(meshes, processes=1, valrange=.0001, cachedir=None):
+    if cachedir != None:
+        for segments in poolMap(sliceCacheJob, ((mesh, cachedir, valrange) for mesh in meshes), processes):
+            if isinstance(segments, SegmentBuffer) != True:
+                segments = SegmentBuffer.load(segments, True)
+            for lineset in segments:
+                yield lineset
+    elif processes == 1:
+        for mesh in meshes:
+            for lineset in meshLineSets(mesh, valrange):
+                yield lineset
+    else:
+        for linesets in poolMap(functools.partial(meshLineSets, valrange=valrange), meshes, processes):
+            for lineset in linesets:
+                yield lineset
+                
+                
+#Writes the Z0 cross section of each mesh to a dxf file.  meshes can be any iterable, like a generator reading one object at a time.
+#With polylines=True each line set is written as one POLYLINE with its straight runs merged.  Lines closer than tolerance are chained together.
+#With a cachedir the cross sections are kept in the slice cache, see lineSetStream.
+def exportDXF(meshes, filepath, processes=1, polylines=False, tolerance=.0001, cachedir=None):
+    with DxfWriter(filepath) as dxf:
+        for lineset in lineSetStream(meshes, processes, tolerance, cachedir):
+            if polylines == True:
+                dxf.addPolyline(*lineSetPolyline(lineset, tolerance))
+            else:
+                dxf.addLines(lineset)
+            
+            
+#Writes the Z0 cross section of each mesh as a gcode toolpath.  Each mesh is sliced, chained and formatted as a stream of line sets,
+#so only one mesh is held in memory at a time unless a process pool is used.
+#With polylines=True straight runs are merged into one move.  Lines closer than tolerance are chained together.
+#With optimize=True the line sets of every mesh are ordered by optimizeTravel first and (travel before, travel after) is returned.
+#With a cachedir the cross sections are kept in the slice cache, see lineSetStream.
+def exportGCODE(meshes, filepath, roundvalues=5, processes=1, polylines=False, tolerance=.0001, optimize=False, timelimit=1.0, cachedir=None):
+    linesets = lineSetStream(meshes, processes, tolerance, cachedir)
+    travel = None
+    if optimize == True:
+        linesets, before, after = optimizeTravel(linesets, (0, 0), timelimit, tolerance)
+        travel = (before, after)
+        
+    with GcodeWriter(filepath) as gcode:
+        gcode.addRawLines(gcodeLineSetText(linesets, roundvalues, polylines, tolerance))
+        gcode.addText("toolup")
+    return travel
+        
+        
+#Writes each mesh to its STL file.  With processes other than 1 the files are written by a process pool.
+def exportSTL(meshes, filepaths, ascii=False, processes=1):
+    for filepath in poolMap(writeSTLJob, ((mesh, filepath, ascii) for mesh, filepath in zip(meshes, filepaths)), processes):
+        pass
+        
+        
+#=================================================
+#Slice Cache.  Cross sections saved as SegmentBuffer files named by mesh hash, Z height and chaining range, so they can be read back
+#through a memory map in later exports and later sessions instead of slicing the mesh again.
+
+#Returns the slice cache file of a mesh's cross section at a Z height.
+def sliceCachePath(mesh, cachedir, height=0.0, valrange=.0001):
+    return os.path.join(cachedir, "%s_z%r_v%r.seg" % (mesh.contentHash(), float(height), float(valrange)))
+    
+    
+#Returns the slice cache file of a mesh's cross section at a Z height, slicing and chaining the mesh into it with meshLineSets if it is not there yet.
+def sliceCacheFile(mesh, cachedir, height=0.0, valrange=.0001):
+    filepath = sliceCachePath(mesh, cachedir, height, valrange)
+    if os.path.isfile(filepath) != True:
+        if os.path.isdir(cachedir) != True:
+            os.makedirs(cachedir, exist_ok=True)
+        with SegmentWriter(filepath) as writer:
+            writer.addLineSets(meshLineSets(mesh, valrange, height))
+    return filepath
+    
+    
+#Returns a mesh's cross section at a Z height as a SegmentBuffer memory mapped from the slice cache.  A SegmentBuffer is returned as it is.
+def sliceCached(mesh, cachedir, height=0.0, valrange=.0001):
+    if isinstance(mesh, SegmentBuffer):
+        return mesh
+    return SegmentBuffer.load(sliceCacheFile(mesh, cachedir, height, valrange), True)
+    
+    
+#Calls sliceCacheFile with a (mesh, cachedir, valrange) tuple at Z0.  Used by process pool workers, a SegmentBuffer is returned as it is.
+def sliceCacheJob(job):
+    if isinstance(job[0], SegmentBuffer):
+        return job[0]
+    return sliceCacheFile(job[0], job[1], 0.0, job[2])
+    
+    
+#Removes every slice cache file in cachedir.
+def sliceCacheClear(cachedir):
+    if os.path.isdir(cachedir) != True:
+        return
+    for filename in os.listdir(cachedir):
+        if filename.endswith(".seg"):
+            os.remove(os.path.join(cachedir, filename))
+            
+            
+#=================================================
+#Incremental Export.  A manifest next to the output records a hash of each mesh, so only meshes that changed are exported again.
+
+#Returns the manifest saved next to an export, or an empty one if there is none.
+def loadManifest(manifestpath):
+    try:
+        f = open(manifestpath, 'r')
+        manifest = json.load(f)
+        f.close()
+    except (IOError, ValueError):
+        return {}
+    if isinstance(manifest, dict) != True:
+        return {}
+    return manifest
+    
+    
+#Saves a manifest next to an export.
+def saveManifest(manifestpath, manifest):
+    f = open(manifestpath, 'w')
+    json.dump(manifest, f, sort_keys=True)
+    f.close()
+    
+    
+#Returns the dxf text of a (mesh, polylines, tolerance) job's Z0 cross section.
+def meshDXFText(job):
+    return ''.join(dxfLineSetText(meshLineSets(job[0], job[2]), job[1], job[2]))
+    
+    
+#Returns the gcode text of a (mesh, roundvalues, polylines, tolerance) job's Z0 cross section.
+def meshGCODEText(job):
+    return ''.join(gcodeLineSetText(meshLineSets(job[0], job[3]), job[1], job[2], job[3]))
+    
+    
+#Writes header, the text of each named mesh and footer to a file.  Text saved in the manifest is reused for meshes with the same hash,
+#the others are made by textfunct from their job in a process pool if processes is not 1.  jobfunct turns a mesh into its textfunct job.
+def exportTextIncremental(names, meshes, filepath, header, footer, textfunct, jobfunct, hashsuffix="", processes=1):
+    manifestpath = filepath + ".manifest"
+    oldmanifest = loadManifest(manifestpath)
+    #Entries of meshes not in this export are kept, so exporting one object does not drop the saved text of the others.
+    newmanifest = dict(oldmanifest)
+    
+    #Only meshes that changed are kept for slicing.
+    names = list(names)
+    hashes = []
+    jobs = []
+    for name, mesh in zip(names, meshes):
+        meshhash = mesh.contentHash() + hashsuffix
+        hashes.append(meshhash)
+        if name not in oldmanifest or oldmanifest[name].get("hash") != meshhash:
+            jobs.append(jobfunct(mesh))
+            
+    texts = poolMap(textfunct, jobs, processes)
+    f = open(filepath, 'w')
+    f.write(header)
+    for name, meshhash in zip(names, hashes):
+        if name in oldmanifest and oldmanifest[name].get("hash") == meshhash:
+            text = oldmanifest[name]["text"]
+        else:
+            text = next(texts)
+        f.write(text)
+        newmanifest[name] = {"hash": meshhash, "text": text}
+    f.write(footer)
+    f.close()
+    saveManifest(manifestpath, newmanifest)
+    
+    
+#Writes the Z0 cross section of each named mesh to a dxf file, reusing the text of meshes that did not change since the last export.
+def exportDXFIncremental(names, meshes, filepath, processes=1, polylines=False, tolerance=.0001):
+    exportTextIncremental(names, meshes, filepath, DXFHEADER, DXFFOOTER, meshDXFText, lambda mesh: (mesh, polylines, tolerance),
+                          "-" + str(polylines) + "-" + str(tolerance), processes)
+    
+    
+#Writes the Z0 cross section of each named mesh as gcode, reusing the text of meshes that did not change since the last export.
+def exportGCODEIncremental(names, meshes, filepath, roundvalues=5, processes=1, polylines=False, tolerance=.0001):
+    exportTextIncremental(names, meshes, filepath, GCODEHEADER, 'toolup\n' + GCODEFOOTER, meshGCODEText,
+                          lambda mesh: (mesh, roundvalues, polylines, tolerance), "-" + str(roundvalues) + "-" + str(polylines) + "-" + str(tolerance), processes)
+                          
+                          
+#Writes each named mesh to its STL file, skipping meshes that did not change since the last export if their file is still there.
+def exportSTLIncremental(names, meshes, filepaths, manifestpath, ascii=False, processes=1):
+    oldmanifest = loadManifest(manifestpath)
+    #Entries of meshes not in this export are kept, so exporting one object does not drop the saved text of the others.
+    newmanifest = dict(oldmanifest)
+    jobs = []
+    for name, mesh, filepath in zip(names, meshes, filepaths):
+        meshhash = mesh.contentHash() + "-" + str(ascii)
+        newmanifest[name] = {"hash": meshhash}
+        if name not in oldmanifest or oldmanifest[name].get("hash") != meshhash or os.path.exists(filepath) != True:
+            jobs.append((mesh, filepath, ascii))
+            
+    for filepath in poolMap(writeSTLJob, jobs, processes):
+        pass
+    saveManifest(manifestpath, newmanifest)
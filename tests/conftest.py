@@ -0,0 +1,66 @@
+#Shared meshes for the openbtcadcore tests.  The core does not need blender, so the tests run in a normal Python shell.
+
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import openbtcadcore as bt
+
+
+#U shaped outline, 3 wide and 3 tall with a notch 1 wide and 2 deep, counter clockwise.  Its area is 7.
+UPOINTS = [(0, 0), (3, 0), (3, 3), (2, 3), (2, 1), (1, 1), (1, 3), (0, 3)]
+
+
+#Returns a prism of a counter clockwise outline from zbottom to ztop, with an n-gon at each end and a quad on each side.
+def prismMesh(points, zbottom=-1.0, ztop=1.0):
+    count = len(points)
+    co = [(x, y, zbottom) for x, y in points] + [(x, y, ztop) for x, y in points]
+    faces = [tuple(reversed(range(count))), tuple(range(count, 2 * count))]
+    faces.extend((i, (i + 1) % count, count + (i + 1) % count, count + i) for i in range(count))
+    return bt.Mesh.fromPolygons(co, faces)
+    
+    
+#Returns a UV sphere of radius 1 with its equator between two rings, so no vertex is on Z0.
+def sphereMesh(segments=32, rings=15):
+    co = [(0, 0, -1)]
+    for ring in range(1, rings):
+        angle = math.pi * ring / rings - math.pi / 2
+        co.extend((math.cos(angle) * math.cos(2 * math.pi * i / segments), math.cos(angle) * math.sin(2 * math.pi * i / segments), math.sin(angle))
+                  for i in range(segments))
+    co.append((0, 0, 1))
+    faces = []
+    for i in range(segments):
+        faces.append((0, 1 + (i + 1) % segments, 1 + i))
+        faces.append((len(co) - 1, 1 + (rings - 2) * segments + i, 1 + (rings - 2) * segments + (i + 1) % segments))
+        for ring in range(rings - 2):
+            faces.append((1 + ring * segments + i, 1 + ring * segments + (i + 1) % segments, 1 + (ring + 1) * segments + (i + 1) % segments,
+                          1 + (ring + 1) * segments + i))
+    return bt.Mesh.fromPolygons(co, faces)
+    
+    
+#Returns lines with their ends in a fixed order and the lines sorted, so cross sections can be compared whatever their order and direction.
+def normalLines(lines, digits=9):
+    normal = []
+    for line in lines:
+        line = tuple(round(value, digits) for value in line)
+        normal.append(min(line, (line[2], line[3], line[0], line[1])))
+    return sorted(normal)
+    
+    
+@pytest.fixture
+def cube():
+    return bt.primitiveGeometry(('CUBE', 0, 0, 0))[0]
+    
+    
+@pytest.fixture
+def umesh():
+    return prismMesh(UPOINTS)
+    
+    
+@pytest.fixture
+def spheres():
+    sphere = sphereMesh()
+    return [sphere, sphere.transformed(bt.Transform.translation((3, 0, 0))), prismMesh(UPOINTS).transformed(bt.Transform.translation((-5, 0, 0)))]
@@ -0,0 +1,93 @@
+#Tests of joining lines into toolpaths: gridmatch, chainLines, SortLineList, mergeCollinear, lineSetPolyline and optimizeTravel.
+
+import math
+import random
+import openbtcadcore as bt
+from conftest import normalLines
+
+
+#gridmatch finds the nearest unused endpoint within valrange, not the first one it sees.
+def test_gridmatchNearest():
+    linelist = [(0, 0, 1, 0), (1.00005, 0, 2, 0), (1, 1, 1, 0)]
+    grid = bt.linegrid(linelist)
+    used = [True, False, False]
+    assert bt.gridmatch(grid, used, linelist, 1, 0) == (2, 1)
+    used[2] = True
+    assert bt.gridmatch(grid, used, linelist, 1, 0) == (1, 0)
+    used[1] = True
+    assert bt.gridmatch(grid, used, linelist, 1, 0) == None
+    
+    
+#A valrange of 0 only joins lines whose ends are exactly equal.
+def test_chainLinesExact():
+    linelist = [(0, 0, 1, 0), (1, 0, 2, 0), (2.00001, 0, 3, 0)]
+    assert list(bt.chainLines(linelist, 0)) == [[(0, 0, 1, 0), (1, 0, 2, 0)], [(2.00001, 0, 3, 0)]]
+    assert len(list(bt.chainLines(linelist, .0001))) == 1
+    
+    
+#Shuffled and turned around lines of two squares chain into two closed line sets that each start at the end of the last line.
+def test_chainLinesSquares():
+    linelist = []
+    for offset in (0, 5):
+        square = [(0, 0), (1, 0), (1, 1), (0, 1)]
+        linelist.extend((square[i][0] + offset, square[i][1], square[i - 3][0] + offset, square[i - 3][1]) for i in range(4))
+    generator = random.Random(1)
+    generator.shuffle(linelist)
+    linelist = [line if generator.random() < .5 else (line[2], line[3], line[0], line[1]) for line in linelist]
+    linesets = list(bt.chainLines(linelist))
+    assert [len(lineset) for lineset in linesets] == [4, 4]
+    for lineset in linesets:
+        assert bt.lineSetClosed(lineset) == True
+        assert all(lineset[i][2:] == lineset[i + 1][:2] for i in range(len(lineset) - 1))
+    assert normalLines(sum(linesets, [])) == normalLines(linelist)
+    sortedlist = bt.SortLineList(linelist)
+    assert sortedlist.count("NewLineSet") == 2
+    
+    
+#mergeCollinear leaves out points in the middle of straight runs, even when they wander within tolerance of the line.
+def test_mergeCollinearStraight():
+    points = [(i / 10.0, .00004 * (-1) ** i) for i in range(11)]
+    assert bt.mergeCollinear(points) == [points[0], points[-1]]
+    corner = [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2)]
+    assert bt.mergeCollinear(corner) == [(0, 0), (2, 0), (2, 2)]
+    
+    
+#mergeCollinear keeps every point of a curve that bends more than tolerance, including long gentle ones.
+def test_mergeCollinearCurve():
+    circle = [(math.cos(2 * math.pi * i / 64), math.sin(2 * math.pi * i / 64)) for i in range(65)]
+    assert bt.mergeCollinear(circle) == circle
+    arc = [(math.cos(.001 * i), math.sin(.001 * i)) for i in range(200)]
+    merged = bt.mergeCollinear(arc)
+    assert 2 < len(merged) < len(arc)
+    for a, b in zip(merged, merged[1:]):
+        start, end = arc.index(a), arc.index(b)
+        assert bt.pointsOnLine(arc[start + 1:end], a, b) == True
+        
+        
+#A closed line set becomes a closed polyline of its corners, the first corner is not repeated.
+def test_lineSetPolyline():
+    square = [(0, 0, .5, 0), (.5, 0, 1, 0), (1, 0, 1, 1), (1, 1, 0, 1), (0, 1, 0, .5), (0, .5, 0, 0)]
+    points, closed = bt.lineSetPolyline(square)
+    assert closed == True
+    assert sorted(points) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    points, closed = bt.lineSetPolyline(square[:3])
+    assert (points, closed) == ([(0, 0), (1, 0), (1, 1)], False)
+    
+    
+#optimizeTravel never travels more than the order it was given and keeps every line.
+def test_optimizeTravel():
+    generator = random.Random(2)
+    linesets = []
+    for count in range(40):
+        x, y = generator.uniform(0, 100), generator.uniform(0, 100)
+        if count % 2 == 0:
+            linesets.append([(x, y, x + 1, y), (x + 1, y, x + 1, y + 1), (x + 1, y + 1, x, y)])
+        else:
+            linesets.append([(x, y, x + 2, y + 1)])
+    ordered, before, after = bt.optimizeTravel(linesets, timelimit=.5)
+    assert after <= before
+    assert after == bt.travelDistance(ordered)
+    assert before == bt.travelDistance(linesets)
+    assert normalLines(sum(ordered, [])) == normalLines(sum(linesets, []))
+    same, before, after = bt.optimizeTravel(linesets[:1])
+    assert same == linesets[:1] and before == after
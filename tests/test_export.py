@@ -0,0 +1,140 @@
+#Tests of the dxf, gcode and STL exports, the slice cache, incremental exports and poolMap.
+
+import os
+import pytest
+import openbtcadcore as bt
+
+
+#Returns the text of a file.
+def readText(filepath):
+    f = open(filepath, 'r')
+    text = f.read()
+    f.close()
+    return text
+    
+    
+#Makes meshLineSets fail, so a test can check nothing is sliced.
+def noSlicing(mesh, valrange=.0001, height=0.0):
+    raise AssertionError("mesh was sliced")
+    
+    
+#exportDXF writes the header, a LINE for each line of each mesh's line sets in order and the footer.
+def test_exportDXF(tmp_path, spheres):
+    filepath = str(tmp_path / "spheres.dxf")
+    bt.exportDXF(spheres, filepath)
+    expected = str(tmp_path / "expected.dxf")
+    with bt.DxfWriter(expected, chunksize=7) as dxf:
+        for mesh in spheres:
+            for lineset in bt.meshLineSets(mesh):
+                dxf.addLines(lineset)
+    assert readText(filepath) == readText(expected)
+    assert readText(filepath).startswith(bt.DXFHEADER) and readText(filepath).endswith(bt.DXFFOOTER)
+    
+    
+#Polylines are written as R12 POLYLINE entities, a VERTEX for each point and a SEQEND.
+def test_dxfPolyline(tmp_path, umesh):
+    filepath = str(tmp_path / "u.dxf")
+    bt.exportDXF([umesh], filepath, polylines=True)
+    text = readText(filepath)
+    assert "LWPOLYLINE" not in text
+    assert text.count("\nPOLYLINE\n") == 1 and text.count("\nVERTEX\n") == 8 and text.count("\nSEQEND\n") == 1
+    assert bt.dxfPolylineText([(0, 1), (2, 3)]) == ('  0\nPOLYLINE\n  8\n0\n 66\n1\n 10\n0.0\n 20\n0.0\n 30\n0.0\n 70\n0\n'
+                                                   '  0\nVERTEX\n  8\n0\n 10\n0\n 20\n1\n 30\n0.0\n'
+                                                   '  0\nVERTEX\n  8\n0\n 10\n2\n 20\n3\n 30\n0.0\n'
+                                                   '  0\nSEQEND\n  8\n0\n')
+    assert '\n 70\n1\n' in bt.dxfPolylineText([(0, 0), (1, 0), (1, 1)], True)
+    
+    
+#exportGCODE raises the tool before each line set and lowers it to follow the line set.
+def test_exportGCODE(tmp_path, umesh):
+    filepath = str(tmp_path / "u.gcode")
+    bt.exportGCODE([umesh], filepath)
+    lines = readText(filepath).splitlines()
+    assert lines[:2] == ["GCodeStart ", "toolup"]
+    assert lines[3] == "tooldown"
+    assert len(lines) == 4 + 8 + 2
+    assert lines[-2:] == ["toolup", "GCodeEnd "]
+    assert bt.exportGCODE([umesh], filepath, optimize=True) == (0.0, 0.0)
+    
+    
+#Exports through a process pool or the slice cache are the same as plain exports, and cached meshes are not sliced again.
+def test_exportSame(tmp_path, spheres, monkeypatch):
+    cachedir = str(tmp_path / "cache")
+    for name, export in (("dxf", bt.exportDXF), ("gcode", bt.exportGCODE)):
+        for polylines in (False, True):
+            plain = str(tmp_path / ("plain." + name))
+            export(spheres, plain, polylines=polylines)
+            pooled = str(tmp_path / ("pooled." + name))
+            export(spheres, pooled, processes=2, polylines=polylines)
+            cached = str(tmp_path / ("cached." + name))
+            export(spheres, cached, polylines=polylines, cachedir=cachedir)
+            assert readText(pooled) == readText(plain)
+            assert readText(cached) == readText(plain)
+    assert len(os.listdir(cachedir)) == len(spheres)
+    
+    plain = str(tmp_path / "plain.dxf")
+    bt.exportDXF(spheres, plain)
+    monkeypatch.setattr(bt, "meshLineSets", noSlicing)
+    cached = str(tmp_path / "again.dxf")
+    bt.exportDXF(spheres, cached, cachedir=cachedir)
+    assert readText(cached) == readText(plain)
+    bt.sliceCacheClear(cachedir)
+    assert os.listdir(cachedir) == []
+    
+    
+#Incremental exports are the same as full exports, and only meshes that changed are sliced again.
+def test_exportIncremental(tmp_path, spheres, monkeypatch):
+    names = ["a", "b", "c"]
+    for name, export, incremental in (("dxf", bt.exportDXF, bt.exportDXFIncremental), ("gcode", bt.exportGCODE, bt.exportGCODEIncremental)):
+        full = str(tmp_path / ("full." + name))
+        export(spheres, full)
+        filepath = str(tmp_path / ("inc." + name))
+        incremental(names, spheres, filepath)
+        assert readText(filepath) == readText(full)
+        
+        #Exporting one object keeps the manifest entries of the others.
+        incremental(["b"], spheres[1:2], filepath, processes=2)
+        assert sorted(bt.loadManifest(filepath + ".manifest")) == names
+        
+        with monkeypatch.context() as patch:
+            patch.setattr(bt, "meshLineSets", noSlicing)
+            incremental(names, spheres, filepath)
+        assert readText(filepath) == readText(full)
+        
+        #A moved mesh is exported again.
+        moved = spheres[:2] + [spheres[2].transformed(bt.Transform.translation((0, 7, 0)))]
+        export(moved, full)
+        incremental(names, moved, filepath)
+        assert readText(filepath) == readText(full)
+        
+        
+#exportSTLIncremental only writes the files of meshes that changed or are missing, and keeps manifest entries of meshes left out.
+def test_exportSTLIncremental(tmp_path, spheres, monkeypatch):
+    names = ["a", "b", "c"]
+    filepaths = [str(tmp_path / (name + ".stl")) for name in names]
+    manifestpath = str(tmp_path / "objects.manifest")
+    bt.exportSTLIncremental(names, spheres, filepaths, manifestpath)
+    contents = [open(filepath, 'rb').read() for filepath in filepaths]
+    bt.exportSTL(spheres, [filepath + ".full" for filepath in filepaths], processes=2)
+    assert contents == [open(filepath + ".full", 'rb').read() for filepath in filepaths]
+    
+    bt.exportSTLIncremental(["a"], spheres[:1], filepaths[:1], manifestpath)
+    assert sorted(bt.loadManifest(manifestpath)) == names
+    
+    written = []
+    monkeypatch.setattr(bt, "writeSTLJob", lambda job: written.append(job[1]))
+    os.remove(filepaths[1])
+    bt.exportSTLIncremental(names, spheres, filepaths, manifestpath)
+    assert written == [filepaths[1]]
+    
+    
+#poolMap gives results in order and rejects process counts that are not None or a number greater than 0.
+def test_poolMap():
+    for processes in (1, 2, None):
+        assert list(bt.poolMap(abs, range(-20, 0), processes)) == list(range(20, 0, -1))
+    results = bt.poolMap(abs, range(-20, 0), 2)
+    assert next(results) == 20
+    results.close()
+    for processes in (0, -1, 1.5, "2"):
+        with pytest.raises(ValueError):
+            list(bt.poolMap(abs, [1], processes))
@@ -0,0 +1,68 @@
+#Tests of SegmentBuffer and SegmentWriter.
+
+import numpy
+import pytest
+import openbtcadcore as bt
+
+
+#Returns a buffer of a closed square and an open line.
+def squareBuffer():
+    return bt.SegmentBuffer.fromLineSets([[(0, 0, 1, 0), (1, 0, 1, 1), (1, 1, 0, 1), (0, 1, 0, 0)], [(5, 5, 6, 6)]])
+    
+    
+#toBytes and fromBytes give back the same lines and offsets.
+def test_bytesRoundTrip():
+    segments = squareBuffer()
+    loaded = bt.SegmentBuffer.fromBytes(segments.toBytes())
+    assert numpy.array_equal(loaded.lines, segments.lines)
+    assert numpy.array_equal(loaded.offsets, segments.offsets)
+    assert list(loaded) == list(segments)
+    with pytest.raises(ValueError):
+        bt.SegmentBuffer.fromBytes(b'NOTSEGMENTS' + bytes(32))
+        
+        
+#save writes the toBytes layout, and load reads it back with or without a memory map.
+def test_saveLoad(tmp_path):
+    segments = squareBuffer()
+    filepath = str(tmp_path / "square.seg")
+    segments.save(filepath)
+    assert open(filepath, 'rb').read() == segments.toBytes()
+    for mmap in (False, True):
+        loaded = bt.SegmentBuffer.load(filepath, mmap)
+        assert list(loaded) == list(segments)
+        
+        
+#SegmentWriter writes line sets as they come, an empty file loads as an empty buffer.
+def test_segmentWriter(tmp_path):
+    filepath = str(tmp_path / "written.seg")
+    with bt.SegmentWriter(filepath) as writer:
+        for lineset in squareBuffer():
+            writer.addLineSet(lineset)
+    assert bt.SegmentBuffer.load(filepath).toBytes() == squareBuffer().toBytes()
+    
+    emptypath = str(tmp_path / "empty.seg")
+    bt.SegmentBuffer().save(emptypath)
+    empty = bt.SegmentBuffer.load(emptypath, True)
+    assert empty.contourCount() == 0 and len(empty) == 0 and list(empty) == []
+    
+    
+#fromLineList and toLineList convert to and from SortLineList output.
+def test_lineList():
+    segments = squareBuffer()
+    linelist = segments.toLineList()
+    assert linelist.count("NewLineSet") == 2
+    assert bt.SegmentBuffer.fromLineList(linelist).toBytes() == segments.toBytes()
+    assert bt.SegmentBuffer.fromLineList([(0, 0, 1, 0), (1, 0, 2, 0)]).contourCount() == 1
+    assert bt.SegmentBuffer.fromLineList(["NewLineSet", "NewLineSet"]).contourCount() == 0
+    
+    
+#concatenate, select and closedMask keep each line set whole.
+def test_concatenateSelect():
+    segments = squareBuffer()
+    both = bt.SegmentBuffer.concatenate([segments, segments])
+    assert both.contourCount() == 4 and len(both) == 10
+    assert both.closedMask().tolist() == [True, False, True, False]
+    closed = both.select(both.closedMask())
+    assert list(closed) == [list(segments)[0], list(segments)[0]]
+    assert numpy.array_equal(both.contour(3), segments.contour(1))
+    assert bt.SegmentBuffer.concatenate([]).contourCount() == 0
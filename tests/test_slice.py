@@ -0,0 +1,71 @@
+#Tests of cutting meshes at Z heights: slicePolygons, crossingPairs, meshLineList, sliceLayers and meshContours.
+
+import numpy
+import openbtcadcore as bt
+from conftest import UPOINTS, normalLines, prismMesh, sphereMesh
+
+
+#The unit cube cut at Z0 is a square of four lines.
+def test_cubeSection(cube):
+    lines = bt.meshLineList(cube)
+    assert normalLines(lines) == normalLines([(-.5, -.5, .5, -.5), (.5, -.5, .5, .5), (.5, .5, -.5, .5), (-.5, .5, -.5, -.5)])
+    
+    
+#A face on the cut is cut as if it was just below it, so a cube standing on Z0 is cut along its bottom face once.
+def test_faceOnCut():
+    cube = bt.primitiveGeometry(('CUBE', 0, 0, 0))[0].transformed(bt.Transform.translation((0, 0, .5)))
+    lines = bt.meshLineList(cube)
+    assert len(lines) == 4
+    assert [len(lineset) for lineset in bt.chainLines(lines)] == [4]
+    
+    
+#A polygon that only touches the cut at a vertex makes no line.
+def test_vertexOnCut():
+    mesh = bt.Mesh.fromPolygons([(0, 0, 0), (1, 0, 1), (0, 1, 1)], [(0, 1, 2)])
+    assert bt.meshLineList(mesh) == []
+    
+    
+#A concave polygon crossing the cut four times makes two lines, paired in order along the cut.
+def test_concavePolygon():
+    mesh = bt.Mesh.fromPolygons([(x, 0, z) for x, z in UPOINTS], [tuple(range(len(UPOINTS)))])
+    polys, lines = bt.slicePolygons(mesh, numpy.array([0]), 2.0)
+    assert polys.tolist() == [0, 0]
+    assert normalLines(lines.tolist()) == [(0, 0, 1, 0), (2, 0, 3, 0)]
+    
+    
+#Crossings are paired per polygon, two crossings make one pair and more are paired in order along the cut.
+def test_crossingPairs():
+    groups = numpy.array([0, 0, 1, 1, 1, 1])
+    xy = numpy.array([(0, 0), (1, 0), (3, 0), (0, 0), (2, 0), (1, 0)], dtype=numpy.float64)
+    pairgroups, first, second = bt.crossingPairs(groups, xy)
+    assert pairgroups.tolist() == [0, 1, 1]
+    assert sorted(sorted((xy[a, 0], xy[b, 0])) for a, b in zip(first, second)) == [[0, 1], [0, 1], [2, 3]]
+    empty = bt.crossingPairs(numpy.empty(0, dtype=numpy.intp), numpy.empty((0, 2)))
+    assert [len(values) for values in empty] == [0, 0, 0]
+    
+    
+#The U prism cut at Z0 is its outline.
+def test_uSection(umesh):
+    lines = bt.meshLineList(umesh)
+    outline = [UPOINTS[i] + UPOINTS[(i + 1) % len(UPOINTS)] for i in range(len(UPOINTS))]
+    assert normalLines(lines) == normalLines(outline)
+    
+    
+#Each layer of sliceLayers is the same as moving the mesh down and cutting it at Z0.
+def test_sliceLayers():
+    sphere = sphereMesh()
+    zvalues = [.5, -2, 0, -.25, .9]
+    layers = bt.sliceLayers(sphere, zvalues)
+    for zvalue, layer in zip(zvalues, layers):
+        assert normalLines(layer) == normalLines(bt.meshLineList(sphere.transformed(bt.Transform.translation((0, 0, -zvalue)))))
+    assert layers[1] == []
+    
+    
+#meshContours gives the same lines as chaining meshLineList, in closed line sets.
+def test_meshContours(spheres, umesh):
+    for mesh in spheres + [umesh, prismMesh(UPOINTS, 0, 1)]:
+        contours = bt.meshContours(mesh)
+        chained = list(bt.chainLines(bt.meshLineList(mesh)))
+        assert normalLines(contours.lines.tolist()) == normalLines(bt.meshLineList(mesh))
+        assert contours.contourCount() == len(chained)
+        assert contours.closedMask().all()
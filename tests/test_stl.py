@@ -0,0 +1,57 @@
+#Tests of splitting polygons into triangles and of writing and reading STL files.
+
+import numpy
+import openbtcadcore as bt
+from conftest import UPOINTS
+
+
+#Returns the area of each triangle in an (n, 3, 3) array of corners.
+def triangleAreas(corners):
+    cross = numpy.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    return numpy.sqrt((cross * cross).sum(axis=1)) / 2
+    
+    
+#earClip splits the U into 6 counter clockwise triangles covering its area, a fan from its first corner would cover the notch.
+def test_earClip():
+    triangles = bt.earClip(UPOINTS)
+    assert len(triangles) == len(UPOINTS) - 2
+    total = 0
+    for a, b, c in triangles:
+        pa, pb, pc = UPOINTS[a], UPOINTS[b], UPOINTS[c]
+        area = ((pb[0] - pa[0]) * (pc[1] - pa[1]) - (pb[1] - pa[1]) * (pc[0] - pa[0])) / 2.0
+        assert area > 0
+        total = total + area
+    assert total == 7
+    
+    
+#meshTriangles splits a concave n-gon into triangles with the polygon's area and normal, whichever way it faces.
+def test_meshTrianglesConcave():
+    for flip in (False, True):
+        face = tuple(range(len(UPOINTS)))
+        mesh = bt.Mesh.fromPolygons([(x, y, 0) for x, y in UPOINTS], [tuple(reversed(face)) if flip == True else face])
+        corners, normals = bt.meshTriangles(mesh)
+        assert len(corners) == 6
+        assert abs(triangleAreas(corners).sum() - 7) < 1e-9
+        assert numpy.allclose(normals, [0, 0, -1 if flip == True else 1])
+        
+        
+#A closed prism gives triangles facing out, each side quad splits into two.  Triangles facing out give the prism's volume a positive sign.
+def test_meshTrianglesPrism(umesh):
+    corners, normals = bt.meshTriangles(umesh)
+    assert len(corners) == 2 * 6 + 8 * 2
+    assert (normals[:, 2] == 1).sum() == 6 and (normals[:, 2] == -1).sum() == 6
+    assert abs(triangleAreas(corners).sum() - (2 * 7 + 2 * 16)) < 1e-9
+    volume = (corners[:, 0] * numpy.cross(corners[:, 1], corners[:, 2])).sum() / 6
+    assert abs(volume - 14) < 1e-9
+    
+    
+#writeSTL and loadSTL give back the same triangles, binary and ascii.
+def test_stlRoundTrip(tmp_path, umesh):
+    corners = bt.meshTriangles(umesh)[0]
+    for ascii in (False, True):
+        filepath = str(tmp_path / ("u_ascii.stl" if ascii == True else "u.stl"))
+        bt.writeSTL(umesh, filepath, ascii)
+        loaded = bt.loadSTL(filepath)
+        assert len(loaded.co) == len(umesh.co)
+        assert numpy.array_equal(bt.meshTriangles(loaded)[0], corners)
+    assert len(open(str(tmp_path / "u.stl"), 'rb').read()) == 84 + 50 * len(corners)